@@ -1,6 +1,10 @@
-from typing import Dict
+from typing import AsyncIterator, Dict
 from pydantic import BaseModel, Field
 from prompts.prompt_template import student_info_summary_template
+from utils.metrics import llm_call, observe_llm_usage
+from utils.tracing import completion_usage, traced, tracer
+import asyncio
+import config
 
 class StudentInfo(BaseModel):
     """Pydantic model for student information"""
@@ -24,10 +28,18 @@ def format_context(student_info: Dict[str, str]) -> str:
 
 # Profile Agent
 class ProfileAgent:
-    def __init__(self, llm):
-        """Initialize the profile agent with the LLM instance"""
+    def __init__(self, llm, max_concurrency: int = config.PROFILE_MAX_CONCURRENCY):
+        """
+        Initialize the profile agent with the LLM instance
+
+        Args:
+            llm: LLM exposing ``acomplete``
+            max_concurrency: Cap on in-flight profile generations per worker
+        """
         self.llm = llm
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
+    @traced("profile.generate_summary")
     async def generate_profile_summary(self, student_info: StudentInfo) -> str:
         """
         Generate a summary of the student profile
@@ -43,12 +55,45 @@ class ProfileAgent:
             student_info_dict = student_info.dict()
             context = format_context(student_info_dict)
 
-            # Generate summary using the provided LLM
-            llm_response = self.llm.complete(
-                student_info_summary_template.format(context=context)
-            )
+            # Generate summary without blocking the event loop
+            async with self._semaphore:
+                with tracer.start_as_current_span("llm.profile_summary"), llm_call("profile"):
+                    llm_response = await self.llm.acomplete(
+                        student_info_summary_template.format(context=context)
+                    )
+                    observe_llm_usage("profile", completion_usage(llm_response))
 
             return llm_response.text.strip()
 
         except Exception as e:
-            raise RuntimeError(f"Error generating profile summary: {str(e)}")
\ No newline at end of file
+            raise RuntimeError(f"Error generating profile summary: {str(e)}")
+
+    async def stream_profile_summary(self, student_info: StudentInfo) -> AsyncIterator[str]:
+        """
+        Stream the profile summary as it is generated
+        
+        Args:
+            student_info: StudentInfo object containing all student information
+        
+        Yields:
+            str: Text deltas of the summary, in order
+        """
+        try:
+            context = format_context(student_info.dict())
+
+            async with self._semaphore:
+                # Not made current: the context would have to survive across yields
+                span = tracer.start_span("llm.profile_summary", attributes={"llm.streamed": True})
+                try:
+                    with llm_call("profile"):
+                        stream = await self.llm.astream_complete(
+                            student_info_summary_template.format(context=context)
+                        )
+                        async for chunk in stream:
+                            if chunk.delta:
+                                yield chunk.delta
+                finally:
+                    span.end()
+
+        except Exception as e:
+            raise RuntimeError(f"Error generating profile summary: {str(e)}")
@@ -1,9 +1,16 @@
 # backend/agents/recommendation_agent.py
-from typing import Dict, Callable, List
-from pydantic import BaseModel, Field, ConfigDict
-from prompts.prompt_template import recommendation_template
+from typing import AsyncIterator, Dict, Callable, List, Optional, Tuple
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from prompts.prompt_template import recommendation_template, typed_recommendation_template
+from utils.json_stream import IncrementalArrayParser
+from utils.metrics import llm_call, observe_llm_usage
+from utils.tracing import traced, tracer
 from datetime import datetime
 import asyncio
+import config
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Pydantic models for structured output
 class QuickView(BaseModel):
@@ -72,10 +79,27 @@ class RecommendationsResponse(BaseModel):
 
 
 
+# Pathway mix produced per student, in display order: (type, count, description)
+RECOMMENDATION_TYPES = [
+    ("alumni", 3, "alumni-based pathways"),
+    ("trend", 1, "emerging industry trend pathway"),
+    ("figure", 1, "notable figure-inspired pathway"),
+]
+
 class RecommendationAgent:
-    def __init__(self, llm):
-        """Initialize the recommendation agent with LLM instance"""
+    def __init__(self, llm, execution_mode: str = config.RECOMMENDATION_MODE, model: str = "gpt-4o"):
+        """
+        Initialize the recommendation agent with LLM instance
+
+        Args:
+            llm: AsyncOpenAI client
+            execution_mode: "single" asks one completion for all pathways; "fanout" runs
+                one smaller completion per pathway type in parallel
+            model: Chat completion model used for every recommendation call
+        """
         self.llm = llm
+        self.model = model
+        self.execution_mode = execution_mode
         self._status_callback = None
         self.timeout = 90  # 90 seconds timeout
 
@@ -104,10 +128,32 @@ class RecommendationAgent:
             formatted_results.append(f"Query: {query}\nResult: {result}")
         return "\n\n".join(formatted_results)
 
-    def _prepare_json_schema(self):
-        """Generate a valid OpenAI-compatible JSON schema"""
+    def _prepare_json_schema(
+        self,
+        recommendation_type: Optional[str] = None,
+        count: int = 0,
+        pathway_description: str = ""
+    ):
+        """
+        Generate a valid OpenAI-compatible JSON schema.
+
+        With ``recommendation_type`` the schema is narrowed to one fan-out call:
+        exactly ``count`` items, all of that type, so it agrees with the typed prompt.
+        """
         raw_schema = RecommendationsResponse.model_json_schema()
         raw_schema["required"] = list(raw_schema["properties"].keys())
+        name = "recommendations_response"
+        if recommendation_type:
+            raw_schema["properties"]["recommendations"].update(
+                description=f"A list of exactly {count} {pathway_description}.",
+                minItems=count,
+                maxItems=count
+            )
+            raw_schema["$defs"]["Recommendation"]["properties"]["type"].update(
+                description=f"The category of the recommendation, always '{recommendation_type}'.",
+                enum=[recommendation_type]
+            )
+            name = f"{recommendation_type}_recommendations_response"
 
         # Recursively ensure additionalProperties is False
         def set_additional_properties_false(schema_part):
@@ -119,45 +165,193 @@ class RecommendationAgent:
 
         set_additional_properties_false(raw_schema)
         return {
-            "name": "recommendations_response",
+            "name": name,
             "schema": raw_schema
         }
 
+    async def _create_completion(self, prompt: str, recommendation_type: str = "all", json_schema: Optional[Dict] = None):
+        """One structured-output completion, traced with its token usage"""
+        with tracer.start_as_current_span(
+            "llm.recommendation",
+            attributes={"llm.model": self.model, "recommendation.type": recommendation_type}
+        ), llm_call("recommendation"):
+            response = await self.llm.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": prompt}],
+                response_format={"type": "json_schema", "json_schema": json_schema or self._prepare_json_schema()}
+            )
+            observe_llm_usage("recommendation", getattr(response, "usage", None))
+            return response
+
+    def _build_prompt(self, search_results: Dict, student_summary: str) -> str:
+        """Format search results with their queries into the recommendation prompt"""
+        alumni_queries = search_results["queries"]["database_queries"]
+        internet_queries = search_results["queries"]["internet_queries"]
+        alumni_results = self._format_alumni_results(search_results["results"]["alumni_profiles"], alumni_queries)
+        internet_results = self._format_internet_results(search_results["results"]["internet_insights"], internet_queries)
+
+        return recommendation_template.format(
+            context=student_summary,
+            alumni_profiles=alumni_results,
+            internet_insights=internet_results
+        )
+
+    def _typed_evidence(self, recommendation_type: str, search_results: Dict) -> Tuple[str, str]:
+        """Context slice for one pathway type: (evidence_label, evidence)"""
+        if recommendation_type == "alumni":
+            evidence = self._format_alumni_results(
+                search_results["results"]["alumni_profiles"],
+                search_results["queries"]["database_queries"]
+            )
+            return "Alumni Profiles", evidence or "No alumni profiles found."
+
+        # internet_search_template asks for the trends query first and the notable-figures query second
+        internet_queries = search_results["queries"]["internet_queries"]
+        index = 0 if recommendation_type == "trend" else 1
+        query = internet_queries[index] if index < len(internet_queries) else None
+        answer = search_results["results"]["internet_insights"].get(query) if query else None
+        if not answer:
+            return "Industry Insights", "No industry insights found."
+        return "Industry Insights", f"Query: {query}\nResult: {answer}"
+
+    async def _generate_typed(
+        self,
+        recommendation_type: str,
+        count: int,
+        pathway_description: str,
+        search_results: Dict,
+        student_summary: str
+    ) -> List[Recommendation]:
+        """Generate the recommendations of one type from only that type's context"""
+        evidence_label, evidence = self._typed_evidence(recommendation_type, search_results)
+        prompt = typed_recommendation_template.format(
+            count=count,
+            pathway_description=pathway_description,
+            recommendation_type=recommendation_type,
+            context=student_summary,
+            evidence_label=evidence_label,
+            evidence=evidence
+        )
+        json_schema = self._prepare_json_schema(recommendation_type, count, pathway_description)
+        response = await self._create_completion(prompt, recommendation_type, json_schema)
+        recommendations = RecommendationsResponse.parse_raw(response.choices[0].message.content).recommendations
+        for recommendation in recommendations:
+            recommendation.type = recommendation_type
+        return recommendations[:count]
+
+    async def _generate_fanout(self, search_results: Dict, student_summary: str) -> RecommendationsResponse:
+        """Run one completion per pathway type in parallel and merge them in display order"""
+        results = await asyncio.gather(*(
+            self._generate_typed(recommendation_type, count, description, search_results, student_summary)
+            for recommendation_type, count, description in RECOMMENDATION_TYPES
+        ), return_exceptions=True)
+
+        merged = []
+        errors = []
+        for (recommendation_type, _, _), result in zip(RECOMMENDATION_TYPES, results):
+            if isinstance(result, BaseException):
+                errors.append(f"{recommendation_type}: {str(result) or type(result).__name__}")
+            else:
+                merged.extend(result)
+        if not merged:
+            raise RuntimeError(f"All recommendation calls failed ({'; '.join(errors)})")
+        for error in errors:
+            logger.warning("Recommendation type failed, returning partial results: %s", error)
+
+        # Renumber so ids stay unique and sequential across the merged calls
+        for new_id, recommendation in enumerate(merged, start=1):
+            recommendation.id = new_id
+        return RecommendationsResponse(recommendations=merged)
+
+    async def stream_recommendations(self, search_results: Dict, student_summary: str) -> AsyncIterator[Recommendation]:
+        """
+        Stream recommendations one at a time as the LLM produces them.
+
+        Each recommendation is yielded as soon as its JSON object closes and validates;
+        objects that fail validation are skipped. Callers enforce the overall deadline.
+        """
+        await self._update_status("Generating recommendations...", 0.4)
+        if self.execution_mode == "fanout":
+            # Yield each type's cards as its call finishes, numbered in arrival order
+            next_id = 1
+            tasks = [
+                asyncio.create_task(
+                    self._generate_typed(recommendation_type, count, description, search_results, student_summary)
+                )
+                for recommendation_type, count, description in RECOMMENDATION_TYPES
+            ]
+            try:
+                for typed_call in asyncio.as_completed(tasks):
+                    try:
+                        recommendations = await typed_call
+                    except Exception as e:
+                        logger.warning("Recommendation type failed, continuing stream: %s", e)
+                        continue
+                    for recommendation in recommendations:
+                        recommendation.id = next_id
+                        next_id += 1
+                        yield recommendation
+            finally:
+                # The consumer may stop early (disconnect, deadline): stop the other calls
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await self._update_status("Finalizing recommendations...", 0.9)
+            return
+
+        # Not made current: the context would have to survive across yields
+        span = tracer.start_span("llm.recommendation", attributes={"llm.model": self.model, "llm.streamed": True})
+        try:
+            with llm_call("recommendation"):
+                stream = await self.llm.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "system", "content": self._build_prompt(search_results, student_summary)}],
+                    response_format={"type": "json_schema", "json_schema": self._prepare_json_schema()},
+                    stream=True
+                )
+
+                # Elements of {"recommendations": [...]} sit two containers deep
+                parser = IncrementalArrayParser(item_depth=2)
+                async for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    for item in parser.feed(chunk.choices[0].delta.content):
+                        try:
+                            yield Recommendation.model_validate(item)
+                        except ValidationError as e:
+                            logger.warning("Skipping invalid streamed recommendation: %s", e)
+        finally:
+            span.end()
+
+        await self._update_status("Finalizing recommendations...", 0.9)
+
+    @traced("recommendation.generate")
     async def generate_recommendations(self, search_results: Dict, student_summary: str) -> Dict:
         """Generate recommendations based on search results and student profile"""
         try:
             await self._update_status("Formatting results for analysis...", 0.3)
 
-            # Extract and format results with queries
-            alumni_queries = search_results["queries"]["database_queries"]
-            internet_queries = search_results["queries"]["internet_queries"]
-            alumni_results = self._format_alumni_results(search_results["results"]["alumni_profiles"], alumni_queries)
-            internet_results = self._format_internet_results(search_results["results"]["internet_insights"], internet_queries)
-
             # Generate recommendations using LLM
             await self._update_status("Generating recommendations...", 0.4)
-            recommendation_prompt = recommendation_template.format(
-                context=student_summary,
-                alumni_profiles=alumni_results,
-                internet_insights=internet_results
-            )
-
-            schema = self._prepare_json_schema()
+            if self.execution_mode != "fanout":
+                recommendation_prompt = self._build_prompt(search_results, student_summary)
 
             try:
-                response = await asyncio.wait_for(
-                    self.llm.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[{"role": "system", "content": recommendation_prompt}],
-                        response_format={"type": "json_schema", "json_schema": schema}
-                    ),
-                    timeout=self.timeout
-                )
+                if self.execution_mode == "fanout":
+                    recommendations_response = await asyncio.wait_for(
+                        self._generate_fanout(search_results, student_summary),
+                        timeout=self.timeout
+                    )
+                else:
+                    response = await asyncio.wait_for(
+                        self._create_completion(recommendation_prompt),
+                        timeout=self.timeout
+                    )
 
-                await self._update_status("Processing LLM response...", 0.8)
+                    await self._update_status("Processing LLM response...", 0.8)
 
-                # Parse response using Pydantic
-                recommendations_response = RecommendationsResponse.parse_raw(response.choices[0].message.content)
+                    # Parse response using Pydantic
+                    recommendations_response = RecommendationsResponse.parse_raw(response.choices[0].message.content)
 
                 await self._update_status("Finalizing recommendations...", 0.9)
 
@@ -185,7 +379,7 @@ class RecommendationAgent:
 
         except Exception as e:
             error_message = str(e)
-            print(f"Error generating recommendations: {error_message}")
+            logger.exception("Error generating recommendations: %s", error_message)
             await self._update_status(f"Error: {error_message}", 1.0)
             return {
                 "status": "error",
@@ -1,11 +1,22 @@
 # search_agent.py
-from typing import Dict, List, Tuple
-from llama_index.core.schema import NodeWithScore
+from typing import Callable, Dict, List, Optional, Tuple
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.base.embeddings.base import BaseEmbedding
 import asyncio
-from llama_index.core.workflow import Workflow, step, Context, Event, StartEvent, StopEvent
+from llama_index.core.workflow import Workflow, WorkflowTimeoutError, step, Context, Event, StartEvent, StopEvent
 from llama_index.core import VectorStoreIndex
 from tavily import TavilyClient
 from prompts.prompt_template import query_diversification_template, internet_search_template
+from agents.tavily_scheduler import TavilySearchScheduler
+from database.hybrid_search import HybridRetriever
+from cache.backends import CacheBackend
+from cache.query_cache import QueryCache
+from utils.metrics import STAGE_ERRORS, llm_call, observe_llm_usage, timed_stage
+from utils.tracing import completion_usage, set_attributes, traced, tracer
+import config
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SearchStatus(Event):
     """Event for tracking search progress"""
@@ -16,18 +27,58 @@ class SearchStatus(Event):
 class DatabaseSearchWorkflow(Workflow):
     """Workflow for database search using LlamaIndex pattern"""
     
-    def __init__(self, hybrid_index: VectorStoreIndex = None, timeout: int = 60, verbose: bool = True):
+    def __init__(
+        self,
+        hybrid_index: VectorStoreIndex = None,
+        embed_model: BaseEmbedding = None,
+        hybrid_retriever: HybridRetriever = None,
+        max_concurrency: int = config.DB_SEARCH_MAX_CONCURRENCY,
+        timeout: int = 60,
+        verbose: bool = True
+    ):
         super().__init__(timeout=timeout, verbose=verbose)
         self.hybrid_index = hybrid_index
+        self.hybrid_retriever = hybrid_retriever
+        # Fall back to the model the index was built with
+        self.embed_model = embed_model or getattr(hybrid_index, "_embed_model", None)
+        self.max_concurrency = max_concurrency
+
+    async def _embed_queries(self, queries: List[str]) -> List[QueryBundle]:
+        """Embed all queries in one batched call so retrievers skip per-query embedding"""
+        if not self.embed_model:
+            return [QueryBundle(query_str=query) for query in queries]
+        # text-embedding-3 models embed queries and documents identically
+        with tracer.start_as_current_span("search.embed_queries", attributes={"query.count": len(queries)}):
+            embeddings = await self.embed_model.aget_text_embedding_batch(queries)
+        return [
+            QueryBundle(query_str=query, embedding=embedding)
+            for query, embedding in zip(queries, embeddings)
+        ]
+
+    async def _fused_search(self, queries: List[str]) -> Dict[str, List[str]]:
+        """Dense + full-text retrieval fused by reciprocal rank in a single SQL statement"""
+        query_bundles = await self._embed_queries(queries)
+        with tracer.start_as_current_span("search.hybrid_retrieve", attributes={"query.count": len(queries)}):
+            fused = await self.hybrid_retriever.aretrieve_batch(
+                queries,
+                [query_bundle.embedding for query_bundle in query_bundles]
+            )
+        return {
+            query: [row["text"] for row in rows]
+            for query, rows in zip(queries, fused)
+        }
 
     @step
     async def start(self, ctx: Context, ev: StartEvent) -> StopEvent:
         """Main workflow step following LlamaIndex pattern"""
         queries = ev.get("search_query")
-        if not queries or not self.hybrid_index:
+        if not queries or not (self.hybrid_index or self.hybrid_retriever):
             return StopEvent({"error": "Missing queries or index", "results": {}})
 
         try:
+            if self.hybrid_retriever:
+                return StopEvent(await self._fused_search(queries))
+
             # Setup retrievers
             vector_retriever = self.hybrid_index.as_retriever(
                 vector_store_query_mode="default",
@@ -37,34 +88,55 @@ class DatabaseSearchWorkflow(Workflow):
                 vector_store_query_mode="sparse",
                 similarity_top_k=5
             )
+            retrievers = [vector_retriever, text_retriever]
+            query_bundles = await self._embed_queries(queries)
+
+            # Run every (query, retriever) pair in one concurrent wave over the store's pool
+            semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+            async def retrieve(retriever, query_bundle: QueryBundle) -> List[NodeWithScore]:
+                async with semaphore:
+                    mode = "dense" if retriever is vector_retriever else "sparse"
+                    with tracer.start_as_current_span("search.retrieve", attributes={"retriever.mode": mode}):
+                        return await retriever.aretrieve(query_bundle)
+
+            retrieved = await asyncio.gather(*(
+                retrieve(retriever, query_bundle)
+                for query_bundle in query_bundles
+                for retriever in retrievers
+            ))
 
-            # Run both retrievers for each query
             results = {}
-            for query in queries:
-                query_results = []
-                for retriever in [vector_retriever, text_retriever]:
-                    retrieved = await retriever.aretrieve(query)
-                    query_results.extend(retrieved)
-                
-                # Sort by score and take top 5
+            for i, query in enumerate(queries):
+                query_results = [
+                    node
+                    for nodes in retrieved[i * len(retrievers):(i + 1) * len(retrievers)]
+                    for node in nodes
+                ]
+
+                # Sort by score, drop nodes returned by both retrievers and take top 5
                 sorted_results = sorted(query_results, key=lambda x: x.score or 0.0, reverse=True)
-                results[query] = "\n".join([
-                    node.node.get_content()
-                    for node in sorted_results[:5]
-                    if node.node is not None
-                ])
+                seen_ids = set()
+                unique_results = []
+                for node in sorted_results:
+                    if node.node is not None and node.node.node_id not in seen_ids:
+                        seen_ids.add(node.node.node_id)
+                        unique_results.append(node.node.get_content())
+                results[query] = unique_results[:5]
 
             return StopEvent(results)
 
         except Exception as e:
-            print(f"Database search error: {str(e)}")
+            logger.exception("Database search error: %s", e)
             return StopEvent({"error": str(e), "results": {}})
 
 class InternetSearchWorkflow(Workflow):
     """Workflow for internet search"""
-    def __init__(self, tavily=None, timeout: int = 60, verbose: bool = True):
+    def __init__(self, tavily=None, scheduler: TavilySearchScheduler = None, timeout: int = 60, verbose: bool = True):
         super().__init__(timeout=timeout, verbose=verbose)
         self.tavily = tavily
+        # Share the agent's scheduler so rate limits hold across concurrent requests
+        self.scheduler = scheduler or TavilySearchScheduler(tavily)
 
     @step
     async def start(self, ctx: Context, ev: StartEvent) -> StopEvent:
@@ -73,111 +145,217 @@ class InternetSearchWorkflow(Workflow):
             return StopEvent({"error": "No search questions provided"})
 
         try:
-            results = {}
             for i, question in enumerate(search_questions):
-                print("--------------------------------")
-                print(f"Searching for question {i+1}: {question}")
-                await asyncio.sleep(0.5 * i)  # Stagger requests
-                try:
-                    answer = await asyncio.wait_for(
-                        asyncio.to_thread(
-                            self.tavily.qna_search,
-                            query=question,
-                            search_depth="advanced",
-                            topic="general",
-                            max_results=10
-                        ),
-                        timeout=55
-                    )
-                    if answer:
-                        results[question] = answer
-                except Exception as e:
-                    print(f"Error in Tavily search for query '{question}': {str(e)}")
-                    continue
-
+                logger.debug("Searching for question %d: %s", i + 1, question)
+            results = await self.scheduler.search_many(search_questions)
             return StopEvent(results)
         except Exception as e:
-            print(f"Internet search error: {str(e)}")
+            logger.exception("Internet search error: %s", e)
             return StopEvent({"error": str(e)})
+
 class SearchAgent:
-    def __init__(self, llm, hybrid_index: VectorStoreIndex, tavily_client: TavilyClient):
+    def __init__(
+        self,
+        llm,
+        hybrid_index: VectorStoreIndex,
+        tavily_client: TavilyClient,
+        embed_model: BaseEmbedding = None,
+        hybrid_retriever: HybridRetriever = None,
+        query_cache: QueryCache = None,
+        tavily_cache: CacheBackend = None,
+        search_timeout: float = 45,
+        stage_timeout: float = 60
+    ):
         self.llm = llm
         self.hybrid_index = hybrid_index
+        self.embed_model = embed_model
+        self.hybrid_retriever = hybrid_retriever
+        self.query_cache = query_cache
         self.tavily_client = tavily_client
+        self.internet_scheduler = TavilySearchScheduler(tavily_client, answer_cache=tavily_cache)
+        self.search_timeout = search_timeout  # Per-side deadline for the search stage
+        self.stage_timeout = stage_timeout  # Query generation plus both sides
         self._status_callback = None
+
     def set_status_callback(self, callback):
         """Set callback for status updates"""
         self._status_callback = callback
 
-    async def _update_status(self, phase: str, message: str, progress: float):
+    async def _update_status(self, phase: str, message: str, progress: float, callback: Optional[Callable] = None):
         """Update search status"""
-        if self._status_callback:
-            await self._status_callback(SearchStatus(phase=phase, message=message, progress=progress))
+        callback = callback or self._status_callback
+        if callback:
+            await callback(SearchStatus(phase=phase, message=message, progress=progress))
+
+    async def _complete_queries(self, kind: str, prompt: str):
+        """One query-generation completion, traced with its token usage"""
+        with tracer.start_as_current_span("llm.query_generation", attributes={"query.kind": kind}), \
+                llm_call("query_generation"):
+            response = await self.llm.acomplete(prompt=prompt)
+            observe_llm_usage("query_generation", completion_usage(response))
+            return response
+
+    async def _generate_queries(self, summary: str) -> Tuple[List[str], List[str]]:
+        """Ask the LLM for database and internet queries concurrently"""
+        with timed_stage("query_generation"):
+            db_response, internet_response = await asyncio.gather(
+                self._complete_queries(
+                    "database",
+                    query_diversification_template.format(summary=summary)
+                ),
+                self._complete_queries(
+                    "internet",
+                    internet_search_template.format(context=summary)
+                )
+            )
+
+        db_response_text = db_response.text.strip()
+        raw_queries = [q.strip() for q in db_response_text.split("\n\n")]
+        db_queries = [
+            query.replace('\n', ' ').strip().strip('"')
+            for query in raw_queries 
+            if query.strip()
+        ]
+
+        internet_queries = [
+            query.strip().strip('"') 
+            for query in internet_response.text.strip().split("\n\n") 
+            if query.strip()
+        ]
 
+        logger.debug("Database queries generated: %s", db_queries)
+        logger.debug("Internet queries generated: %s", internet_queries)
+        return db_queries, internet_queries
+
+    @traced("search.generate_queries")
     async def generate_search_queries(self, summary: str) -> Tuple[List[str], List[str]]:
         """Generate database and internet search queries based on the summary."""
         try:
-            print("Generating search queries from summary:", summary)
+            logger.debug("Generating search queries from summary: %s", summary)
+            if not self.query_cache:
+                return await self._generate_queries(summary)
 
-            # Generate database queries
-            db_response = await self.llm.acomplete(
-                prompt=query_diversification_template.format(summary=summary)
-            )
-            db_response_text = db_response.text.strip()
-            raw_queries = [q.strip() for q in db_response_text.split("\n\n")]
-            db_queries = [
-                query.replace('\n', ' ').strip().strip('"')
-                for query in raw_queries 
-                if query.strip()
-            ]
-
-            # Generate internet queries
-            internet_response = await self.llm.acomplete(
-                prompt=internet_search_template.format(context=summary)
+            queries, cache_hit = await self.query_cache.get_or_generate(
+                summary,
+                lambda: self._generate_queries(summary)
             )
-            internet_queries = [
-                query.strip().strip('"') 
-                for query in internet_response.text.strip().split("\n\n") 
-                if query.strip()
-            ]
-
-            print("Database queries generated:", db_queries)
-            print("Internet queries generated:", internet_queries)
-
-            return db_queries, internet_queries
+            set_attributes(**{"cache.hit": cache_hit})
+            if cache_hit:
+                logger.info("Using cached search queries")
+            return queries
         except Exception as e:
-            print(f"Error generating queries: {e}")
+            logger.exception("Error generating queries: %s", e)
             raise
 
-    async def execute_combined_search(self, summary: str) -> Dict:
-        """Execute both database and internet searches in parallel."""
+    async def _run_search_side(
+        self,
+        name: str,
+        workflow: Workflow,
+        timeout: float,
+        status_callback: Optional[Callable],
+        **run_kwargs
+    ) -> Tuple[Dict, Optional[str]]:
+        """Run one side of the search stage, returning (results, error) instead of raising."""
+        await self._update_status(f"search_{name}", f"Searching {name} sources...", 0.4, status_callback)
+        try:
+            # The workflow's own timeout is the deadline: it cancels its step tasks
+            # before failing, which an outer wait_for on the handler would not
+            with tracer.start_as_current_span(f"search.{name}"), timed_stage(f"search_{name}"):
+                results = await workflow.run(**run_kwargs)
+        except WorkflowTimeoutError:
+            error = f"{name} search timed out after {timeout:.1f}s"
+        except Exception as e:
+            error = f"{name} search failed: {str(e)}"
+        else:
+            # Workflows report their own failures as an "error" key
+            if isinstance(results, dict) and "error" in results:
+                error = f"{name} search failed: {results['error']}"
+                STAGE_ERRORS.inc(f"search_{name}")
+            else:
+                await self._update_status(f"search_{name}", f"Finished {name} search", 0.8, status_callback)
+                return results, None
+
+        logger.warning(error)
+        set_attributes(**{f"search.{name}.error": error})
+        await self._update_status(f"search_{name}", error, 0.8, status_callback)
+        return {}, error
+
+    @traced("search.execute_combined")
+    async def execute_combined_search(self, summary: str, status_callback: Optional[Callable] = None) -> Dict:
+        """
+        Execute both database and internet searches in parallel.
+
+        The whole stage has one deadline (``stage_timeout``). Whatever query
+        generation leaves of it, capped at ``search_timeout``, becomes each side's
+        workflow timeout, so a side always times out on its own and the other
+        side's results are still returned, with the failure recorded under
+        ``results["errors"]``. Callers should not add an outer timeout: cancelling
+        the workflows from outside loses the partial results. ``status_callback``
+        overrides the agent-level callback so concurrent requests can report
+        progress on their own channel.
+        """
         try:
-            await self._update_status("init", "Starting search process...", 0.1)
-            await self._update_status("query_generation", "Generating search queries...", 0.2)
-            db_queries, internet_queries = await self.generate_search_queries(summary)
-
-            await self._update_status("search", "Running parallel searches...", 0.4)
-            db_workflow = DatabaseSearchWorkflow(hybrid_index=self.hybrid_index, timeout=60, verbose=True)
-            internet_workflow = InternetSearchWorkflow(tavily=self.tavily_client, timeout=60, verbose=True)
-
-            # Run workflows
-            await self._update_status("search_db", "Searching alumni database...", 0.6)
-            db_results = await db_workflow.run(search_query=db_queries)
-            await self._update_status("search_internet", "Searching internet resources...", 0.8)
-            internet_results = await internet_workflow.run(search_questions=internet_queries)
-            await self._update_status("complete", "Search completed", 1.0)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.stage_timeout
+            await self._update_status("init", "Starting search process...", 0.1, status_callback)
+            await self._update_status("query_generation", "Generating search queries...", 0.2, status_callback)
+            # Nothing to salvage yet, so plain cancellation is fine here
+            db_queries, internet_queries = await asyncio.wait_for(
+                self.generate_search_queries(summary),
+                timeout=self.stage_timeout
+            )
+            side_timeout = min(self.search_timeout, deadline - loop.time())
+            if side_timeout <= 0:
+                raise asyncio.TimeoutError()
+
+            await self._update_status("search", "Running parallel searches...", 0.3, status_callback)
+            db_workflow = DatabaseSearchWorkflow(
+                hybrid_index=self.hybrid_index,
+                embed_model=self.embed_model,
+                hybrid_retriever=self.hybrid_retriever,
+                timeout=side_timeout,
+                verbose=False
+            )
+            internet_workflow = InternetSearchWorkflow(
+                tavily=self.tavily_client,
+                scheduler=self.internet_scheduler,
+                timeout=side_timeout,
+                verbose=False
+            )
+
+            # Run workflows concurrently; each side collects its own errors
+            (db_results, db_error), (internet_results, internet_error) = await asyncio.gather(
+                self._run_search_side("database", db_workflow, side_timeout, status_callback, search_query=db_queries),
+                self._run_search_side(
+                    "internet", internet_workflow, side_timeout, status_callback, search_questions=internet_queries
+                )
+            )
+
+            errors = {
+                side: error
+                for side, error in (("database", db_error), ("internet", internet_error))
+                if error
+            }
+            if len(errors) == 2:
+                raise RuntimeError("; ".join(errors.values()))
+
+            await self._update_status("complete", "Search completed", 1.0, status_callback)
+            results = {
+                "alumni_profiles": db_results,
+                "internet_insights": internet_results
+            }
+            if errors:
+                results["errors"] = errors
+
             return {
                 "queries": {
                     "database_queries": db_queries,
                     "internet_queries": internet_queries
                 },
-                "results": {
-                    "alumni_profiles": db_results,
-                    "internet_insights": internet_results
-                }
+                "results": results
             }
 
         except Exception as e:
-            await self._update_status("error", f"Search failed: {str(e)}", 1.0)
-            print(f"Search error: {str(e)}")
-            raise
\ No newline at end of file
+            await self._update_status("error", f"Search failed: {str(e)}", 1.0, status_callback)
+            logger.exception("Search error: %s", e)
+            raise
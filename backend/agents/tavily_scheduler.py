@@ -0,0 +1,174 @@
+# agents/tavily_scheduler.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import asyncio
+import functools
+import httpx
+import requests
+import config
+from cache.backends import CacheBackend, CacheStats
+from cache.keys import hash_key, normalize_text
+from utils.concurrency import SingleFlight, TokenBucket, retry_with_jitter
+from utils.metrics import TAVILY_CALLS
+from utils.tracing import set_attributes, traced, tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "tavily_answers"
+
+class TransientSearchError(Exception):
+    """Upstream 5xx response; worth retrying unlike 4xx, auth and quota errors"""
+
+# Network failures, timeouts and server errors from the sync (requests) and async (httpx) clients
+TRANSIENT_ERRORS = (
+    TransientSearchError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.TransportError,
+)
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+class TavilySearchScheduler:
+    """
+    Bounded-concurrency, rate-limited fan-out for Tavily QnA searches.
+
+    One scheduler is shared by every request on a worker so the concurrency cap
+    and token bucket apply to the worker as a whole. Async clients are awaited
+    directly; blocking clients run on a shared, bounded executor. With an
+    ``answer_cache``, answers are reused for ``cache_ttl`` seconds, and concurrent
+    identical questions share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        tavily,
+        max_concurrency: int = config.TAVILY_MAX_CONCURRENCY,
+        rate_per_second: float = config.TAVILY_RATE_PER_SECOND,
+        burst: int = config.TAVILY_BURST,
+        query_timeout: float = config.TAVILY_QUERY_TIMEOUT,
+        max_retries: int = config.TAVILY_MAX_RETRIES,
+        retry_base_delay: float = config.TAVILY_RETRY_BASE_DELAY,
+        executor: Optional[ThreadPoolExecutor] = None,
+        answer_cache: Optional[CacheBackend] = None,
+        cache_ttl: float = config.TAVILY_CACHE_TTL
+    ):
+        self.tavily = tavily
+        self.query_timeout = query_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency),
+            thread_name_prefix="tavily"
+        )
+        self._is_async = asyncio.iscoroutinefunction(getattr(tavily, "qna_search", None))
+        self.answer_cache = answer_cache
+        self.cache_ttl = cache_ttl
+        self.cache_stats = CacheStats()
+        self._flights = SingleFlight()
+
+    def _params(self, question: str) -> Dict:
+        return {
+            "query": question,
+            "search_depth": config.TAVILY_SEARCH_DEPTH,
+            "topic": "general",
+            "max_results": config.TAVILY_MAX_RESULTS
+        }
+
+    def cache_key(self, question: str) -> str:
+        """Key on the normalized question plus every parameter that shapes the answer"""
+        params = self._params(normalize_text(question))
+        return hash_key(*(params[name] for name in sorted(params)))
+
+    async def _call(self, question: str) -> str:
+        """Issue a single upstream call once a concurrency slot and a rate-limit token are free"""
+        params = self._params(question)
+        async with self._semaphore:
+            await self._bucket.acquire()
+            status = "error"
+            try:
+                with tracer.start_as_current_span(
+                    "tavily.call",
+                    attributes={"tavily.search_depth": params["search_depth"]}
+                ):
+                    if self._is_async:
+                        answer = await self.tavily.qna_search(**params)
+                    else:
+                        loop = asyncio.get_running_loop()
+                        answer = await loop.run_in_executor(
+                            self._executor,
+                            functools.partial(self.tavily.qna_search, **params)
+                        )
+                status = "ok"
+                return answer
+            except (requests.exceptions.HTTPError, httpx.HTTPStatusError) as e:
+                code = _status_code(e)
+                if code is not None and code >= 500:
+                    raise TransientSearchError(f"Tavily returned {code}") from e
+                raise
+            finally:
+                TAVILY_CALLS.inc(status)
+
+    @traced("tavily.search")
+    async def search(self, question: str) -> Optional[str]:
+        """Answer one question from the cache, a shared in-flight call, or upstream"""
+        key = self.cache_key(question)
+        if self.answer_cache:
+            try:
+                cached = await self.answer_cache.get(NAMESPACE, key)
+            except Exception as e:
+                self.cache_stats.errors += 1
+                logger.warning("Tavily cache lookup failed: %s", e)
+                cached = None
+            set_attributes(**{"cache.hit": cached is not None})
+            if cached is not None:
+                self.cache_stats.hits += 1
+                return cached
+            self.cache_stats.misses += 1
+        return await self._flights.do(key, lambda: self._search_upstream(question, key))
+
+    async def _search_upstream(self, question: str, key: str) -> Optional[str]:
+        """
+        Answer one question within its deadline, retrying transient failures.
+
+        The deadline covers queueing for a concurrency slot too; the slot is held
+        only for each call, not across backoff sleeps.
+        """
+        deadline = asyncio.get_running_loop().time() + self.query_timeout
+        answer = await retry_with_jitter(
+            lambda: self._call(question),
+            attempts=self.max_retries + 1,
+            base_delay=self.retry_base_delay,
+            deadline=deadline,
+            retry_on=TRANSIENT_ERRORS
+        )
+        if answer and self.answer_cache:
+            try:
+                await self.answer_cache.set(NAMESPACE, key, answer, self.cache_ttl)
+            except Exception as e:
+                self.cache_stats.errors += 1
+                logger.warning("Tavily cache store failed: %s", e)
+        return answer
+
+    async def search_many(self, questions: List[str]) -> Dict[str, str]:
+        """Answer all questions concurrently; failed or empty answers are dropped"""
+        async def search_one(question: str) -> Optional[str]:
+            try:
+                return await self.search(question)
+            except Exception as e:
+                logger.warning("Error in Tavily search for query '%s': %s", question, str(e) or type(e).__name__)
+                return None
+
+        answers = await asyncio.gather(*(search_one(q) for q in questions))
+        return {question: answer for question, answer in zip(questions, answers) if answer}
+
+    def shutdown(self):
+        """Release executor threads"""
+        self._executor.shutdown(wait=False)
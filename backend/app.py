@@ -1,27 +1,43 @@
 # app.py
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict
+from typing import Dict, List, Tuple
 import os
 from dotenv import load_dotenv
-from sqlalchemy import make_url, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
 from llama_index.llms.openai import OpenAI
 from openai import AsyncOpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.vector_stores.postgres import PGVectorStore
 from llama_index.core import VectorStoreIndex
 from agents.profile_agent import ProfileAgent, StudentInfo
-from agents.search_agent import SearchAgent
-from agents.recommendation_agent import RecommendationAgent
+from agents.search_agent import SearchAgent, SearchStatus
+from agents.recommendation_agent import RecommendationAgent, Recommendation
 from database.db import (
     AsyncSessionLocal, 
     init_db, 
     save_session, 
-    save_recommendation_session, 
-    get_verified_recommendation_session,
-    verify_session
+    update_session_summary,
+    delete_session,
+    lookup_session,
+    vector_engine,
+    pool_options,
+    pool_statuses,
+    dispose_engines,
+    check_readiness
 )
+from database.hybrid_search import HybridRetriever
+from database.persistence import RecommendationWriter
+from database.retention import SessionReaper
+from database.vector_store import build_embedding_model, build_vector_store
+from cache.backends import build_cache_backend
+from cache.embedding_cache import CachedEmbedding
+from cache.query_cache import QueryCache
+from cache.result_cache import ResultCache
+from utils.log import bind_session_id, setup_logging, shutdown_logging
+from utils.metrics import CONTENT_TYPE, REGISTRY, timed_stage, track_websocket
+from utils.stats import LoopLagMonitor, percentile
+from utils.tracing import set_attributes, setup_tracing, shutdown_tracing, traced
 from database.models import StudentSession, RecommendationSession
 from contextlib import asynccontextmanager
 import uuid
@@ -29,18 +45,34 @@ import json
 from tavily import TavilyClient
 from datetime import datetime
 import asyncio
+import config
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
+setup_logging()
+setup_tracing()
 
 # Lifespan for database initialization
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    recommendation_writer.start()
+    if config.REAPER_ENABLED:
+        session_reaper.start()
+    loop_lag_monitor.start()
     yield
     # Shutdown
-    pass
+    await loop_lag_monitor.stop()
+    await session_reaper.stop()
+    await recommendation_writer.stop()
+    search_agent.internet_scheduler.shutdown()
+    await dispose_engines()
+    shutdown_tracing()
+    shutdown_logging()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
@@ -50,26 +82,38 @@ connection_string = os.getenv("DB_CONNECTION")
 tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
 url = make_url(connection_string)
 
-# Create embedding model
-embedding_model = OpenAIEmbedding(model="text-embedding-3-large")
+# Create embedding model, caching vectors for queries we have already embedded
+embedding_model = build_embedding_model()
+if config.EMBED_CACHE_ENABLED:
+    embedding_model = CachedEmbedding(
+        embedding_model,
+        build_cache_backend(config.EMBED_CACHE_BACKEND, config.EMBED_CACHE_MAX_ENTRIES),
+        ttl=config.EMBED_CACHE_TTL
+    )
 
 # Set up vector store
-vector_store = PGVectorStore.from_params(
-    database='ai_advising_db',
-    host=url.host,
-    password=url.password,
-    port=url.port,
-    user=url.username,
-    table_name="alumni_records",
-    embed_dim=3072,
-    hybrid_search=True,
-    text_search_config="english",
-)
+vector_store = build_vector_store(url, create_engine_kwargs=pool_options())
 hybrid_index = VectorStoreIndex.from_vector_store(
     vector_store=vector_store,
     embed_model=embedding_model
 )
 
+def vector_store_engines() -> Dict:
+    """PGVectorStore's own sync and async engines, once its first query has created them"""
+    # This PGVectorStore cannot be handed an engine, so it pools separately with pool_options()
+    engines = {
+        "vector_store": getattr(vector_store, "_engine", None),
+        "vector_store_async": getattr(vector_store, "_async_engine", None),
+    }
+    return {role: store_engine for role, store_engine in engines.items() if store_engine is not None}
+
+# Single-statement hybrid retrieval (vector KNN + full-text, fused in SQL) on the shared pool
+hybrid_retriever = HybridRetriever(
+    engine=vector_engine,
+    table_name=config.ALUMNI_TABLE_NAME,
+    text_search_config="english"
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -82,42 +126,129 @@ app.add_middleware(
 # Initialize agents
 llm = OpenAI(model="gpt-4", api_key=os.getenv("OPENAI_API_KEY"))
 profile_agent = ProfileAgent(llm=llm)
-search_agent = SearchAgent(llm=llm, hybrid_index=hybrid_index, tavily_client=tavily)
+query_cache = QueryCache(
+    backend=build_cache_backend(config.QUERY_CACHE_BACKEND, config.QUERY_CACHE_MAX_ENTRIES),
+    ttl=config.QUERY_CACHE_TTL,
+    embed_model=embedding_model,
+    similarity_threshold=config.QUERY_CACHE_SIMILARITY,
+    max_semantic_entries=config.QUERY_CACHE_SEMANTIC_ENTRIES
+) if config.QUERY_CACHE_ENABLED else None
+search_agent = SearchAgent(
+    llm=llm,
+    hybrid_index=hybrid_index,
+    tavily_client=tavily,
+    embed_model=embedding_model,
+    hybrid_retriever=hybrid_retriever,
+    query_cache=query_cache,
+    tavily_cache=build_cache_backend(
+        config.TAVILY_CACHE_BACKEND, config.TAVILY_CACHE_MAX_ENTRIES
+    ) if config.TAVILY_CACHE_ENABLED else None
+)
 recommendation_agent = RecommendationAgent(llm=AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+recommendation_writer = RecommendationWriter()
+result_cache = ResultCache(
+    backend=build_cache_backend(config.PIPELINE_CACHE_BACKEND, config.PIPELINE_CACHE_MAX_ENTRIES),
+    max_age=config.PIPELINE_CACHE_MAX_AGE,
+    model_versions={
+        "profile": llm.model,
+        "embedding": config.EMBED_MODEL,
+        "recommendation": recommendation_agent.model
+    }
+) if config.PIPELINE_CACHE_ENABLED else None
+session_reaper = SessionReaper()
+loop_lag_monitor = LoopLagMonitor(max_samples=1200)  # About the last minute at the default interval
 
-async def save_recommendations_background(
-    session_id: str,
-    search_queries: Dict,
-    search_results: Dict,
-    recommendations: Dict
-):
-    """Background task to save recommendations to database"""
-    async with AsyncSessionLocal() as db:
-        try:
-            await save_recommendation_session(
-                session_id=session_id,
-                search_queries=search_queries,
-                search_results=search_results,
-                recommendations=recommendations,
-                db=db
-            )
-        except Exception as e:
-            print(f"Background save failed: {e}")
+# Saturation metrics read at scrape time
+def cache_lookup_samples() -> Dict:
+    caches = {
+        "query": query_cache.stats if query_cache else None,
+        "tavily": search_agent.internet_scheduler.cache_stats if search_agent.internet_scheduler.answer_cache else None,
+        "embedding": embedding_model.stats if isinstance(embedding_model, CachedEmbedding) else None,
+        "pipeline": result_cache.stats if result_cache else None,
+    }
+    samples = {}
+    for name, stats in caches.items():
+        if stats is not None:
+            samples[(name, "hit")] = stats.hits
+            samples[(name, "miss")] = stats.misses
+            samples[(name, "error")] = stats.errors
+    return samples
+
+REGISTRY.callback(
+    "advising_cache_lookups_total", "Cache lookups by result", ["cache", "result"],
+    cache_lookup_samples, kind="counter"
+)
+REGISTRY.callback(
+    "advising_db_pool_connections", "Connection pool state", ["pool", "state"],
+    lambda: {(pool, state): value for pool, status in pool_statuses(vector_store_engines()).items() for state, value in status.items()}
+)
+REGISTRY.callback(
+    "advising_persist_queue_depth", "Recommendations waiting for the write-behind writer", [],
+    lambda: {(): recommendation_writer.pending}
+)
+REGISTRY.callback(
+    "advising_event_loop_lag_seconds", "Event-loop lag over the last minute", ["quantile"],
+    lambda: {
+        (str(q / 100),): percentile(list(loop_lag_monitor.samples), q) for q in (50, 99)
+    } if loop_lag_monitor.samples else {}
+)
+
+async def stream_profile_summary(
+    websocket: WebSocket,
+    student_info: StudentInfo,
+    form_data: Dict,
+    db: AsyncSession
+) -> Tuple[uuid.UUID, str]:
+    """Forward summary tokens as profile_summary_delta messages while the session row is saved"""
+    # Insert the session concurrently with generation; only the summary update waits for the LLM
+    save_task = asyncio.create_task(save_session(form_data=form_data, summary=None, db=db))
+    chunks = []
+    try:
+        async for delta in profile_agent.stream_profile_summary(student_info):
+            chunks.append(delta)
+            await websocket.send_json({
+                "type": "profile_summary_delta",
+                "payload": {"delta": delta}
+            })
+        session_id = await save_task
+        summary = "".join(chunks).strip()
+        await update_session_summary(session_id, summary, db)
+    except BaseException:
+        # Cancelling the insert mid-commit could still leave the row behind, so let it
+        # finish and then delete it rather than keep a session with no summary
+        saved, = await asyncio.gather(save_task, return_exceptions=True)
+        if isinstance(saved, uuid.UUID):
+            try:
+                await delete_session(saved, db)
+            except Exception as e:
+                logger.warning("Could not remove unfinished session %s: %s", saved, e)
+        raise
+
+    return session_id, summary
 
 @app.websocket("/ws/profile")
+@track_websocket("profile")
+@traced("ws.profile")
 async def profile_websocket(websocket: WebSocket):
     await websocket.accept()
     async with AsyncSessionLocal() as db:
         try:
             data = await websocket.receive_json()
             student_info = StudentInfo(**data)
-            summary = await profile_agent.generate_profile_summary(student_info)
-            
-            session_id = await save_session(
-                form_data=data,
-                summary=summary,
-                db=db
-            )
+
+            with timed_stage("profile"):
+                if websocket.query_params.get("stream") == "true":
+                    session_id, summary = await stream_profile_summary(websocket, student_info, data, db)
+                else:
+                    summary = await profile_agent.generate_profile_summary(student_info)
+
+                    session_id = await save_session(
+                        form_data=data,
+                        summary=summary,
+                        db=db
+                    )
+            bind_session_id(session_id)
+            set_attributes(**{"session.id": str(session_id)})
             
             await websocket.send_json({
                 "type": "profile_summary",
@@ -140,6 +271,8 @@ async def profile_websocket(websocket: WebSocket):
             await websocket.close()
 
 @app.websocket("/ws/verify_session")
+@track_websocket("verify_session")
+@traced("ws.verify_session")
 async def verify_session_websocket(websocket: WebSocket):
     await websocket.accept()
     
@@ -155,34 +288,45 @@ async def verify_session_websocket(websocket: WebSocket):
             })
             return
 
-        # First check for existing recommendations
+        bind_session_id(session_id)
+        set_attributes(**{"session.id": str(session_id)})
+
+        # Verify the session and load any stored recommendations in one query
         async with AsyncSessionLocal() as db:
-            existing_rec, error_message = await get_verified_recommendation_session(session_id, db)
-            if error_message:
-                if "No recommendations found" not in error_message:
-                    await websocket.send_json({
-                        "type": "error",
-                        "payload": error_message
-                    })
-                    return
-            elif existing_rec and existing_rec.get('recommendations'):
-                await websocket.send_json({
-                    "type": "recommendations",
-                    "payload": existing_rec
-                })
-                return
+            is_valid, error_message, session, existing_rec = await lookup_session(session_id, db)
+        if not is_valid:
+            await websocket.send_json({
+                "type": "error",
+                "payload": error_message
+            })
+            return
 
-            # If no existing recommendations, verify session and get summary if needed
-            is_valid, error_message, session = await verify_session(session_id, db)
-            if not is_valid:
-                await websocket.send_json({
-                    "type": "error",
-                    "payload": error_message
-                })
-                return
+        if existing_rec and existing_rec.get('recommendations'):
+            await websocket.send_json({
+                "type": "recommendations",
+                "payload": existing_rec
+            })
+            return
 
-            if not student_summary or student_summary == 'fetch_from_db':
-                student_summary = session.profile_summary
+        # A fresh result for identical form content skips search and generation entirely
+        cached = await result_cache.get(session.form_data) if result_cache else None
+        if result_cache:
+            set_attributes(**{"pipeline_cache.hit": cached is not None})
+        if cached:
+            recommendation_writer.enqueue(
+                session_id=session_id,
+                search_queries=cached["search_queries"],
+                search_results=cached["search_results"],
+                recommendations=cached["recommendations"]
+            )
+            await websocket.send_json({
+                "type": "recommendations",
+                "payload": cached["recommendations"]
+            })
+            return
+
+        if not student_summary or student_summary == 'fetch_from_db':
+            student_summary = session.profile_summary
 
         try:
             # Start search process
@@ -195,11 +339,23 @@ async def verify_session_websocket(websocket: WebSocket):
                 }
             })
 
-            # Execute search with timeout
-            search_results = await asyncio.wait_for(
-                search_agent.execute_combined_search(student_summary),
-                timeout=60
-            )
+            async def send_search_status(status: SearchStatus):
+                # Map search progress (0-1) onto the 0.1-0.5 band before recommendation starts
+                await websocket.send_json({
+                    "type": "status",
+                    "payload": {
+                        "phase": status.phase,
+                        "message": status.message,
+                        "progress": round(0.1 + 0.4 * status.progress, 2)
+                    }
+                })
+
+            # The agent enforces the search deadline itself so a timed-out side keeps the other's results
+            with timed_stage("search"):
+                search_results = await search_agent.execute_combined_search(
+                    student_summary,
+                    status_callback=send_search_status
+                )
 
             await websocket.send_json({
                 "type": "status",
@@ -210,34 +366,59 @@ async def verify_session_websocket(websocket: WebSocket):
                 }
             })
 
-            # Generate recommendations with timeout
-            recommendations = await asyncio.wait_for(
-                recommendation_agent.generate_recommendations(
-                    search_results,
-                    student_summary
-                ),
-                timeout=90
-            )
+            with timed_stage("recommendation"):
+                if websocket.query_params.get("stream") == "true":
+                    async def stream_recommendations() -> List[Recommendation]:
+                        # Send each card as soon as it validates
+                        streamed = []
+                        async for rec in recommendation_agent.stream_recommendations(search_results, student_summary):
+                            streamed.append(rec)
+                            await websocket.send_json({
+                                "type": "recommendation",
+                                "payload": rec.dict()
+                            })
+                        return streamed
+
+                    recommendation_list = await asyncio.wait_for(stream_recommendations(), timeout=90)
+                    if not recommendation_list:
+                        raise ValueError("No valid recommendations were generated")
+                else:
+                    # Generate recommendations with timeout
+                    recommendations = await asyncio.wait_for(
+                        recommendation_agent.generate_recommendations(
+                            search_results,
+                            student_summary
+                        ),
+                        timeout=90
+                    )
 
-            if recommendations.get("status") == "error":
-                raise ValueError(recommendations.get("error"))
+                    if recommendations.get("status") == "error":
+                        raise ValueError(recommendations.get("error"))
+                    recommendation_list = recommendations["recommendations"]
 
             # Prepare response data
             recommendation_data = {
-                "recommendations": [rec.dict() for rec in recommendations["recommendations"]],
+                "recommendations": [rec.dict() for rec in recommendation_list],
                 "timestamp": datetime.utcnow().isoformat()
             }
 
-            # Save recommendations to database in background
-            background_tasks = BackgroundTasks()
-            background_tasks.add_task(
-                save_recommendations_background,
+            # Save recommendations through the write-behind queue
+            recommendation_writer.enqueue(
                 session_id=session_id,
                 search_queries=search_results["queries"],
                 search_results=search_results["results"],
                 recommendations=recommendation_data
             )
 
+            # Degraded runs (one search side failed) are not worth reusing
+            if result_cache and not search_results["results"].get("errors"):
+                await result_cache.set(
+                    session.form_data,
+                    search_queries=search_results["queries"],
+                    search_results=search_results["results"],
+                    recommendations=recommendation_data
+                )
+
             # Send final recommendations
             await websocket.send_json({
                 "type": "recommendations",
@@ -246,14 +427,14 @@ async def verify_session_websocket(websocket: WebSocket):
 
         except asyncio.TimeoutError:
             error_msg = "Operation timed out. Please try again."
-            print(f"Timeout error: {error_msg}")
+            logger.warning("Timeout error: %s", error_msg)
             await websocket.send_json({
                 "type": "error",
                 "payload": error_msg
             })
         except Exception as e:
             error_msg = f"Error in recommendation generation: {str(e)}"
-            print(error_msg)
+            logger.exception(error_msg)
             await websocket.send_json({
                 "type": "error",
                 "payload": error_msg
@@ -261,7 +442,7 @@ async def verify_session_websocket(websocket: WebSocket):
 
     except Exception as e:
         error_msg = f"Session verification error: {str(e)}"
-        print(error_msg)
+        logger.exception(error_msg)
         await websocket.send_json({
             "type": "error",
             "payload": error_msg
@@ -270,8 +451,21 @@ async def verify_session_websocket(websocket: WebSocket):
         try:
             await websocket.close()
         except Exception as e:
-            print(f"Error closing websocket: {e}")
+            logger.debug("Error closing websocket: %s", e)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy", "pools": pool_statuses(vector_store_engines())}
+
+@app.get("/ready")
+async def readiness_check():
+    checks = await check_readiness()
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        {"status": "ready" if ready else "unavailable", "checks": checks},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
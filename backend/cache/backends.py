@@ -0,0 +1,171 @@
+# cache/backends.py
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.models import CacheEntry
+import time
+
+class CacheStats:
+    """Hit/miss counters for one cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.semantic_hits = 0
+        self.errors = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "semantic_hits": self.semantic_hits,
+            "errors": self.errors,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+class CacheBackend:
+    """Async key/value store with per-entry TTL; values must be JSON-serializable"""
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = await self.get(namespace, key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+class InMemoryCache(CacheBackend):
+    """Per-process LRU with TTL"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[float], Any]]" = OrderedDict()
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return value
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[(namespace, key)] = (expires_at, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, namespace: str, key: str):
+        self._entries.pop((namespace, key), None)
+
+class PostgresCache(CacheBackend):
+    """Shared cache in the cache_entries table, surviving restarts and shared across workers"""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            # Imported lazily: database.db connects to DB_CONNECTION at import time
+            from database.db import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(CacheEntry.key, CacheEntry.value).where(
+                    CacheEntry.namespace == namespace,
+                    CacheEntry.key.in_(keys),
+                    or_(CacheEntry.expires_at.is_(None), CacheEntry.expires_at > datetime.utcnow())
+                )
+            )
+            return {row.key: row.value for row in result}
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        now = datetime.utcnow()
+        values = {
+            "namespace": namespace,
+            "key": key,
+            "value": value,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl) if ttl else None,
+        }
+        stmt = pg_insert(CacheEntry).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheEntry.namespace, CacheEntry.key],
+            set_={
+                "value": stmt.excluded.value,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            }
+        )
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def delete(self, namespace: str, key: str):
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(CacheEntry).where(CacheEntry.namespace == namespace, CacheEntry.key == key)
+            )
+            await db.commit()
+
+class TieredCache(CacheBackend):
+    """In-memory LRU in front of a shared backend; backend hits are promoted to memory"""
+
+    def __init__(self, memory: InMemoryCache, backing: CacheBackend, memory_ttl: Optional[float] = None):
+        self.memory = memory
+        self.backing = backing
+        self.memory_ttl = memory_ttl
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        found = await self.memory.get_many(namespace, keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_backing = await self.backing.get_many(namespace, missing)
+            for key, value in from_backing.items():
+                await self.memory.set(namespace, key, value, self.memory_ttl)
+            found.update(from_backing)
+        return found
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        await self.memory.set(namespace, key, value, min(filter(None, (ttl, self.memory_ttl)), default=None))
+        await self.backing.set(namespace, key, value, ttl)
+
+    async def delete(self, namespace: str, key: str):
+        await self.memory.delete(namespace, key)
+        await self.backing.delete(namespace, key)
+
+def build_cache_backend(kind: str, max_entries: int = 1000) -> CacheBackend:
+    """'memory' for a per-process LRU, 'postgres' for an LRU in front of the shared table"""
+    if kind == "memory":
+        return InMemoryCache(max_entries=max_entries)
+    if kind == "postgres":
+        return TieredCache(InMemoryCache(max_entries=max_entries), PostgresCache())
+    raise ValueError(f"Unknown cache backend: {kind}")
@@ -0,0 +1,112 @@
+# cache/embedding_cache.py
+from typing import Any, Dict, List, Optional
+import base64
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from .backends import CacheBackend, CacheStats
+from .keys import hash_key
+from utils.tracing import set_attributes
+import logging
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "embeddings"
+
+def encode_embedding(embedding: Embedding) -> str:
+    """float16 bytes, base64-encoded so every backend can store it as JSON"""
+    return base64.b64encode(np.asarray(embedding, dtype=np.float16).tobytes()).decode("ascii")
+
+def decode_embedding(value: str) -> Embedding:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float16).astype(np.float32).tolist()
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Content-addressed cache around another embedding model.
+
+    Keys cover the model name, output dimensions, query/text mode and the exact
+    input text, so a model or dimension change never serves stale vectors. Batch
+    calls look up every text at once and only embed the misses. The sync methods
+    pass straight through; the request path is async.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _backend: CacheBackend = PrivateAttr()
+    _ttl: Optional[float] = PrivateAttr()
+    _model_version: str = PrivateAttr()
+    _stats: CacheStats = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, backend: CacheBackend, ttl: Optional[float] = None, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            callback_manager=inner.callback_manager,
+            **kwargs
+        )
+        self._inner = inner
+        self._backend = backend
+        self._ttl = ttl or None
+        self._model_version = hash_key(inner.class_name(), inner.model_name, getattr(inner, "dimensions", None))[:16]
+        self._stats = CacheStats()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._stats
+
+    def _key(self, mode: str, text: str) -> str:
+        return hash_key(self._model_version, mode, text)
+
+    async def _lookup(self, mode: str, texts: List[str]) -> Dict[str, Embedding]:
+        keys = {text: self._key(mode, text) for text in texts}
+        try:
+            found = await self._backend.get_many(NAMESPACE, list(set(keys.values())))
+        except Exception as e:
+            self._stats.errors += 1
+            logger.warning("Embedding cache lookup failed: %s", e)
+            found = {}
+        hits = {text: decode_embedding(found[key]) for text, key in keys.items() if key in found}
+        self._stats.hits += len(hits)
+        self._stats.misses += len(keys) - len(hits)
+        set_attributes(**{"embedding_cache.hits": len(hits), "embedding_cache.misses": len(keys) - len(hits)})
+        return hits
+
+    async def _store(self, mode: str, embeddings: Dict[str, Embedding]):
+        try:
+            for text, embedding in embeddings.items():
+                await self._backend.set(NAMESPACE, self._key(mode, text), encode_embedding(embedding), self._ttl)
+        except Exception as e:
+            self._stats.errors += 1
+            logger.warning("Embedding cache store failed: %s", e)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        cached = await self._lookup("query", [query])
+        if query in cached:
+            return cached[query]
+        embedding = await self._inner.aget_query_embedding(query)
+        await self._store("query", {query: embedding})
+        return embedding
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        cached = await self._lookup("text", texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            embedded = dict(zip(missing, await self._inner.aget_text_embedding_batch(missing)))
+            await self._store("text", embedded)
+            cached.update(embedded)
+        return [cached[text] for text in texts]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._inner.get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._inner.get_text_embedding(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self._inner.get_text_embedding_batch(texts)
@@ -0,0 +1,17 @@
+# cache/keys.py
+import hashlib
+import json
+from typing import Any
+
+def normalize_text(value: str) -> str:
+    """Case- and whitespace-insensitive form of a text used in cache keys"""
+    return " ".join(value.lower().split())
+
+def hash_key(*parts: Any) -> str:
+    """Stable sha256 over JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def prompt_fingerprint(*templates) -> str:
+    """Short hash of prompt template texts, so cached LLM output is invalidated when a prompt changes"""
+    return hash_key(*(getattr(template, "template", str(template)) for template in templates))[:16]
@@ -0,0 +1,183 @@
+# cache/query_cache.py
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+import numpy as np
+from prompts.prompt_template import query_diversification_template, internet_search_template
+from .backends import CacheBackend, CacheStats
+from .keys import hash_key, normalize_text, prompt_fingerprint
+import logging
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "search_queries"
+
+# (database_queries, internet_queries)
+QueryLists = Tuple[List[str], List[str]]
+
+class SemanticIndex:
+    """
+    Fixed-size ring of unit-normalized summary embeddings in one float32 matrix.
+
+    A lookup is a single matrix-vector product, so scanning the full index stays
+    around a millisecond and never needs to leave the event loop.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._keys: List[Optional[str]] = [None] * self.max_entries
+        self._matrix: Optional[np.ndarray] = None  # Allocated on first add, once the dimension is known
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def add(self, key: str, embedding: List[float]):
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        self._matrix[self._next] = vector
+        self._keys[self._next] = key
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+    def nearest(self, embedding: List[float], threshold: float) -> Optional[str]:
+        """Key of the most similar summary with cosine similarity >= ``threshold``"""
+        if not self._size:
+            return None
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+        scores = self._matrix[:self._size] @ vector
+        best = int(np.argmax(scores))
+        return self._keys[best] if scores[best] >= threshold else None
+
+class QueryCache:
+    """
+    Cache of generated (database_queries, internet_queries) keyed by profile summary.
+
+    The exact tier keys on a hash of the normalized summary and the query-generation
+    prompts. The optional semantic tier embeds the summary and reuses the entry of the
+    most similar previously seen summary above ``similarity_threshold``; it runs
+    alongside query generation, so a semantic miss costs no extra latency. A semantic
+    hit is also stored under the summary's exact key, so repeats skip the embedding call.
+
+    The similarity index lives in process memory even when ``backend`` is shared
+    (postgres): each worker only matches summaries it has stored itself since start-up.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float,
+        embed_model=None,
+        similarity_threshold: float = 0.0,
+        max_semantic_entries: int = 1000
+    ):
+        """
+        Args:
+            backend: Storage for cached query lists
+            ttl: Seconds an entry stays valid
+            embed_model: Embedding model for the semantic tier
+            similarity_threshold: Minimum cosine similarity for a semantic hit; 0 disables the tier
+            max_semantic_entries: Summaries kept in the in-process similarity index
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.embed_model = embed_model
+        self.similarity_threshold = similarity_threshold
+        self.prompt_version = prompt_fingerprint(query_diversification_template, internet_search_template)
+        self.stats = CacheStats()
+        self._semantic_index = SemanticIndex(max_semantic_entries)
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embed_model is not None and self.similarity_threshold > 0
+
+    def key_for(self, summary: str) -> str:
+        return hash_key(self.prompt_version, normalize_text(summary))
+
+    async def _get(self, key: str) -> Optional[QueryLists]:
+        try:
+            cached = await self.backend.get(NAMESPACE, key)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Query cache lookup failed: %s", e)
+            return None
+        if cached is None:
+            return None
+        return cached["database_queries"], cached["internet_queries"]
+
+    async def _semantic_lookup(self, summary: str) -> Tuple[Optional[QueryLists], Optional[List[float]]]:
+        """(queries of the nearest cached summary or None, summary embedding to index on store)"""
+        try:
+            embedding = await self.embed_model.aget_text_embedding(normalize_text(summary))
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Query cache embedding failed: %s", e)
+            return None, None
+        key = self._semantic_index.nearest(embedding, self.similarity_threshold)
+        return (await self._get(key) if key else None), embedding
+
+    async def _store(self, key: str, queries: QueryLists, embedding: Optional[List[float]]):
+        db_queries, internet_queries = queries
+        try:
+            await self.backend.set(NAMESPACE, key, {
+                "database_queries": db_queries,
+                "internet_queries": internet_queries
+            }, self.ttl)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Query cache store failed: %s", e)
+            return
+        if embedding is not None:
+            self._semantic_index.add(key, embedding)
+
+    async def get_or_generate(
+        self,
+        summary: str,
+        generate: Callable[[], Awaitable[QueryLists]]
+    ) -> Tuple[QueryLists, bool]:
+        """
+        Cached queries for ``summary``, or the result of ``generate()``, which is then stored.
+
+        On an exact miss ``generate()`` starts right away; the semantic lookup
+        (embedding + index scan) runs alongside it and a hit cancels generation.
+        Cache failures are counted and logged, never raised.
+
+        Returns:
+            (queries, whether they came from the cache)
+        """
+        key = self.key_for(summary)
+        cached = await self._get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached, True
+
+        generation = asyncio.create_task(generate())
+        try:
+            embedding = None
+            if self.semantic_enabled:
+                cached, embedding = await self._semantic_lookup(summary)
+                if cached is not None:
+                    self.stats.hits += 1
+                    self.stats.semantic_hits += 1
+                    await self._store(key, cached, embedding)
+                    return cached, True
+            queries = await generation
+        finally:
+            if not generation.done():
+                generation.cancel()
+                await asyncio.gather(generation, return_exceptions=True)
+
+        self.stats.misses += 1
+        await self._store(key, queries, embedding)
+        return queries, False
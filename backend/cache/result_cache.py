@@ -0,0 +1,87 @@
+# cache/result_cache.py
+from datetime import datetime
+from typing import Dict, Optional
+from llama_index.core.prompts.base import PromptTemplate
+from agents.profile_agent import StudentInfo
+from prompts import prompt_template
+from .backends import CacheBackend, CacheStats
+from .keys import hash_key, normalize_text, prompt_fingerprint
+import logging
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "pipeline_results"
+
+def templates_fingerprint() -> str:
+    """Fingerprint of every template in prompts/prompt_template.py, in name order"""
+    templates = sorted(
+        (name, value) for name, value in vars(prompt_template).items()
+        if isinstance(value, PromptTemplate)
+    )
+    return prompt_fingerprint(*(template for _, template in templates))
+
+def canonical_student_info(form_data: Dict) -> Dict[str, str]:
+    """StudentInfo fields only, normalized, so cosmetic edits to a form map to the same key"""
+    return {
+        field: normalize_text(str(form_data.get(field) or ""))
+        for field in sorted(StudentInfo.model_fields)
+    }
+
+class ResultCache:
+    """
+    Content-addressed cache of finished pipeline output (search + recommendations).
+
+    Keys hash the canonical StudentInfo together with the model names and a
+    fingerprint of all prompt templates, so a resubmitted form can reuse earlier
+    recommendations while any template or model change invalidates every entry.
+    Entries older than ``max_age`` seconds are treated as stale and regenerated.
+    """
+
+    def __init__(self, backend: CacheBackend, max_age: float, model_versions: Dict[str, str]):
+        """
+        Args:
+            backend: Storage for pipeline results
+            max_age: Freshness window in seconds
+            model_versions: Models used by each pipeline stage, e.g. {"profile": "gpt-4"}
+        """
+        self.backend = backend
+        self.max_age = max_age
+        self.version = hash_key(templates_fingerprint(), model_versions)[:16]
+        self.stats = CacheStats()
+
+    def key_for(self, form_data: Dict) -> str:
+        return hash_key(self.version, canonical_student_info(form_data))
+
+    def is_fresh(self, entry: Dict) -> bool:
+        created = datetime.fromisoformat(entry["cached_at"])
+        return (datetime.utcnow() - created).total_seconds() <= self.max_age
+
+    async def get(self, form_data: Dict) -> Optional[Dict]:
+        """
+        Returns:
+            Dict with search_queries, search_results and recommendations, or None
+        """
+        try:
+            entry = await self.backend.get(NAMESPACE, self.key_for(form_data))
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Result cache lookup failed: %s", e)
+            entry = None
+        if entry is not None and self.is_fresh(entry):
+            self.stats.hits += 1
+            return entry
+        self.stats.misses += 1
+        return None
+
+    async def set(self, form_data: Dict, search_queries: Dict, search_results: Dict, recommendations: Dict):
+        entry = {
+            "search_queries": search_queries,
+            "search_results": search_results,
+            "recommendations": recommendations,
+            "cached_at": datetime.utcnow().isoformat()
+        }
+        try:
+            await self.backend.set(NAMESPACE, self.key_for(form_data), entry, self.max_age)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Result cache store failed: %s", e)
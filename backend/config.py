@@ -0,0 +1,100 @@
+# config.py
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Database connection pool settings (the session ORM and hybrid retrieval share one pool;
+# PGVectorStore opens its own sync and async pools with the same settings)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"  # Log every SQL statement
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Seconds to wait for a free connection
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # asyncpg prepared statements; 0 behind pgbouncer
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))  # Per-check deadline for /ready
+
+# Session lifecycle
+SESSION_TTL_MINUTES = int(os.getenv("SESSION_TTL_MINUTES", "60"))  # Sessions expire for clients after this
+SESSION_RETENTION_HOURS = float(os.getenv("SESSION_RETENTION_HOURS", "24"))  # Expired rows are reaped after this
+REAPER_ENABLED = os.getenv("REAPER_ENABLED", "true").lower() == "true"
+REAPER_INTERVAL_SECONDS = float(os.getenv("REAPER_INTERVAL_SECONDS", "300"))
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "500"))  # Sessions removed per transaction
+REAPER_MAX_BATCHES = int(os.getenv("REAPER_MAX_BATCHES", "20"))  # Per run, to bound lock time and I/O
+SESSION_ARCHIVE = os.getenv("SESSION_ARCHIVE", "false").lower() == "true"  # Move to monthly archive partitions
+ARCHIVE_RETENTION_MONTHS = int(os.getenv("ARCHIVE_RETENTION_MONTHS", "6"))  # Older archive partitions are dropped
+
+# Profile generation
+PROFILE_MAX_CONCURRENCY = int(os.getenv("PROFILE_MAX_CONCURRENCY", "16"))  # In-flight summaries per worker
+
+# Recommendation generation
+RECOMMENDATION_MODE = os.getenv("RECOMMENDATION_MODE", "single")  # "single" call or parallel per-type "fanout"
+
+# Alumni vector store
+VECTOR_DB_NAME = os.getenv("VECTOR_DB_NAME", "ai_advising_db")
+ALUMNI_TABLE_NAME = os.getenv("ALUMNI_TABLE_NAME", "alumni_records")
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-large")
+EMBED_DIM = int(os.getenv("EMBED_DIM", "3072"))  # Below the model's native size uses Matryoshka truncation
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "vector")  # "vector" or "halfvec"
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+
+# Query embedding cache
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_BACKEND = os.getenv("EMBED_CACHE_BACKEND", "memory")  # "memory" or "postgres"
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "5000"))  # ~6 KB each at 3072 dims
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "0"))  # 0 never expires; the model is part of the key
+
+# Alumni database search
+DB_SEARCH_MAX_CONCURRENCY = int(os.getenv("DB_SEARCH_MAX_CONCURRENCY", "8"))  # Concurrent retriever calls per request
+
+# Generated search query cache
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+QUERY_CACHE_BACKEND = os.getenv("QUERY_CACHE_BACKEND", "memory")  # "memory" or "postgres"
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "86400"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1000"))
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0"))  # e.g. 0.97 enables near-duplicate hits
+QUERY_CACHE_SEMANTIC_ENTRIES = int(os.getenv("QUERY_CACHE_SEMANTIC_ENTRIES", "1000"))  # Per-process similarity index size, even with the postgres backend
+
+# Internet search (Tavily)
+TAVILY_SEARCH_DEPTH = os.getenv("TAVILY_SEARCH_DEPTH", "advanced")
+TAVILY_MAX_RESULTS = int(os.getenv("TAVILY_MAX_RESULTS", "10"))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "4"))  # In-flight calls per worker
+TAVILY_RATE_PER_SECOND = float(os.getenv("TAVILY_RATE_PER_SECOND", "2"))  # Sustained request rate, 0 disables
+TAVILY_BURST = int(os.getenv("TAVILY_BURST", "4"))  # Token bucket capacity
+TAVILY_QUERY_TIMEOUT = float(os.getenv("TAVILY_QUERY_TIMEOUT", "40"))  # Deadline per question, queueing and retries included
+TAVILY_MAX_RETRIES = int(os.getenv("TAVILY_MAX_RETRIES", "2"))
+TAVILY_RETRY_BASE_DELAY = float(os.getenv("TAVILY_RETRY_BASE_DELAY", "0.5"))
+TAVILY_CACHE_ENABLED = os.getenv("TAVILY_CACHE_ENABLED", "true").lower() == "true"
+TAVILY_CACHE_BACKEND = os.getenv("TAVILY_CACHE_BACKEND", "postgres")  # Shared across workers and restarts; or "memory"
+TAVILY_CACHE_TTL = float(os.getenv("TAVILY_CACHE_TTL", "21600"))  # Trends go stale; 6 hours by default
+TAVILY_CACHE_MAX_ENTRIES = int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "2000"))
+
+# Full-pipeline result cache (recommendations reused for resubmitted forms)
+PIPELINE_CACHE_ENABLED = os.getenv("PIPELINE_CACHE_ENABLED", "false").lower() == "true"
+PIPELINE_CACHE_BACKEND = os.getenv("PIPELINE_CACHE_BACKEND", "postgres")  # Shared so any worker can reuse results
+PIPELINE_CACHE_MAX_AGE = float(os.getenv("PIPELINE_CACHE_MAX_AGE", "259200"))  # Freshness window, 3 days
+PIPELINE_CACHE_MAX_ENTRIES = int(os.getenv("PIPELINE_CACHE_MAX_ENTRIES", "500"))
+
+# Recommendation persistence (write-behind queue)
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "20"))
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.5"))  # Max seconds a record waits for batch-mates
+PERSIST_MAX_RETRIES = int(os.getenv("PERSIST_MAX_RETRIES", "3"))
+PERSIST_RETRY_BASE_DELAY = float(os.getenv("PERSIST_RETRY_BASE_DELAY", "0.5"))
+PERSIST_MAX_RETRY_TIME = float(os.getenv("PERSIST_MAX_RETRY_TIME", "10"))  # Retry budget per batch, in seconds
+PERSIST_QUEUE_SIZE = int(os.getenv("PERSIST_QUEUE_SIZE", "1000"))
+PERSIST_DRAIN_TIMEOUT = float(os.getenv("PERSIST_DRAIN_TIMEOUT", "10"))
+
+# Tracing
+SERVICE_NAME = os.getenv("SERVICE_NAME", "ai-advising-backend")
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # "none", "console", "otlp-file" or "otlp" (gRPC)
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")  # Used by the otlp-file exporter
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))  # Share of sessions whose DEBUG lines are kept
@@ -1,28 +1,118 @@
 # db.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker, joinedload
 from sqlalchemy.future import select
+from sqlalchemy import delete, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from .models import Base, StudentSession, RecommendationSession
+from .migrations import run_migrations
 import os
 from dotenv import load_dotenv
+from utils.tracing import set_attributes, traced
+import config
+import asyncio
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Tuple
+from typing import Any, Optional, Dict, List, Tuple
 
 # Load environment variables
 load_dotenv()
 connection_string = os.getenv("DB_CONNECTION").replace("psycopg2", "asyncpg")
 
+def pool_options() -> Dict:
+    """Pool settings shared by every engine, including PGVectorStore's own engines (which set echo themselves)"""
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+
+def engine_options() -> Dict:
+    """Pool plus asyncpg driver settings for the application's async engines"""
+    return {
+        **pool_options(),
+        "echo": config.DB_ECHO,
+        "connect_args": {
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            # Applied per connection so vector queries need no extra SET round trip
+            "server_settings": {"hnsw.ef_search": str(config.HNSW_EF_SEARCH)},
+        },
+    }
+
 # Database setup using asyncpg
-engine = create_async_engine(connection_string, echo=True)
+engine = create_async_engine(connection_string, **engine_options())
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Vector retrieval shares the session pool when both live in the same database
+if engine.url.database == config.VECTOR_DB_NAME:
+    vector_engine = engine
+else:
+    vector_engine = create_async_engine(
+        engine.url.set(database=config.VECTOR_DB_NAME),
+        **engine_options()
+    )
+
+def pool_status(pool_engine: Any = engine) -> Dict:
+    """Saturation snapshot of a sync or async engine's connection pool"""
+    pool = getattr(pool_engine, "sync_engine", pool_engine).pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_connections": pool.size() + config.DB_MAX_OVERFLOW,
+    }
+
+def pool_statuses(extra_engines: Optional[Dict[str, Any]] = None) -> Dict[str, Dict]:
+    """
+    Pool snapshots keyed by role; the vector entry only appears when it has its own pool.
+    ``extra_engines`` adds engines created outside this module, such as PGVectorStore's.
+    """
+    statuses = {"database": pool_status(engine)}
+    if vector_engine is not engine:
+        statuses["vector"] = pool_status(vector_engine)
+    for role, extra_engine in (extra_engines or {}).items():
+        statuses[role] = pool_status(extra_engine)
+    return statuses
+
+async def dispose_engines():
+    """Close every pooled connection (call on shutdown)"""
+    await engine.dispose()
+    if vector_engine is not engine:
+        await vector_engine.dispose()
+
+async def check_readiness(timeout: float = config.READINESS_TIMEOUT) -> Dict[str, Dict]:
+    """Ping the session database and the alumni vector table, each within ``timeout`` seconds"""
+    async def check(check_engine: AsyncEngine, statement: str) -> Dict:
+        start = time.perf_counter()
+
+        async def ping():
+            async with check_engine.connect() as conn:
+                await conn.execute(text(statement))
+
+        try:
+            await asyncio.wait_for(ping(), timeout=timeout)
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    database, vector_table = await asyncio.gather(
+        check(engine, "SELECT 1"),
+        check(vector_engine, f'SELECT 1 FROM "public"."data_{config.ALUMNI_TABLE_NAME}" LIMIT 1')
+    )
+    return {"database": database, "vector_table": vector_table}
+
 # Async: Create tables on startup
+@traced("db.init_db")
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
 
 # Database dependency for async sessions
 async def get_db():
@@ -30,7 +120,8 @@ async def get_db():
         yield session
 
 # Async helper function to save session
-async def save_session(form_data: dict, summary: str, db: AsyncSession) -> uuid.UUID:
+@traced("db.save_session")
+async def save_session(form_data: dict, summary: Optional[str], db: AsyncSession) -> uuid.UUID:
     from .models import StudentSession
     try:
         session = StudentSession(
@@ -46,6 +137,31 @@ async def save_session(form_data: dict, summary: str, db: AsyncSession) -> uuid.
         await db.rollback()
         raise e
 
+@traced("db.update_session_summary")
+async def update_session_summary(session_id: uuid.UUID, summary: str, db: AsyncSession) -> None:
+    """Store the profile summary on a session saved before generation finished"""
+    try:
+        await db.execute(
+            update(StudentSession)
+            .where(StudentSession.session_id == session_id)
+            .values(profile_summary=summary)
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+@traced("db.delete_session")
+async def delete_session(session_id: uuid.UUID, db: AsyncSession) -> None:
+    """Remove a session whose summary was never produced"""
+    try:
+        await db.execute(delete(StudentSession).where(StudentSession.session_id == session_id))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+@traced("db.verify_session")
 async def verify_session(
     session_id: str,
     db: AsyncSession
@@ -69,8 +185,7 @@ async def verify_session(
         if not session:
             return False, "Session not found", None
 
-        # Check if session is expired (1 hour)
-        if datetime.utcnow() - session.timestamp > timedelta(hours=1):
+        if is_session_expired(session):
             return False, "Session expired", None
 
         return True, None, session
@@ -78,7 +193,93 @@ async def verify_session(
     except Exception as e:
         return False, f"Error verifying session: {str(e)}", None
 
+def is_session_expired(session: StudentSession) -> bool:
+    """Sessions expire SESSION_TTL_MINUTES (one hour by default) after creation"""
+    return datetime.utcnow() - session.timestamp > timedelta(minutes=config.SESSION_TTL_MINUTES)
+
+def recommendation_payload(rec_session: RecommendationSession) -> Dict:
+    """Client-facing view of a stored recommendation session"""
+    return {
+        "session_id": str(rec_session.session_id),
+        "recommendations": rec_session.recommendations,
+        "timestamp": rec_session.timestamp.isoformat()
+    }
+
+@traced("db.lookup_session")
+async def lookup_session(
+    session_id: str,
+    db: AsyncSession
+) -> Tuple[bool, Optional[str], Optional[StudentSession], Optional[Dict]]:
+    """
+    Verify a session and load any stored recommendations in a single query
+    Returns: (is_valid, error_message, session_object, recommendation_data)
+    """
+    try:
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            return False, "Invalid session ID format", None, None
+
+        # LEFT OUTER JOIN to recommendation_sessions: one round trip for both rows
+        # Only the columns the cache-hit reply needs; search_results is deferred anyway
+        stmt = select(StudentSession).options(
+            joinedload(StudentSession.recommendations).load_only(
+                RecommendationSession.session_id,
+                RecommendationSession.recommendations,
+                RecommendationSession.timestamp
+            )
+        ).where(
+            StudentSession.session_id == session_uuid
+        )
+        result = await db.execute(stmt)
+        session = result.unique().scalar_one_or_none()
+
+        if not session:
+            return False, "Session not found", None, None
+
+        if is_session_expired(session):
+            return False, "Session expired", None, None
+
+        rec_session = session.recommendations
+        return True, None, session, recommendation_payload(rec_session) if rec_session else None
+
+    except Exception as e:
+        return False, f"Error verifying session: {str(e)}", None, None
+
+def _recommendation_upsert(values: List[Dict]):
+    """INSERT ... ON CONFLICT (session_id) DO UPDATE ... RETURNING for recommendation sessions"""
+    stmt = pg_insert(RecommendationSession).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[RecommendationSession.session_id],
+        set_={
+            "search_queries": stmt.excluded.search_queries,
+            "search_results": stmt.excluded.search_results,
+            "recommendations": stmt.excluded.recommendations,
+            "timestamp": stmt.excluded.timestamp
+        }
+    ).returning(
+        RecommendationSession.session_id,
+        RecommendationSession.recommendations,
+        RecommendationSession.timestamp
+    )
+
+def _recommendation_values(
+    session_id: str,
+    search_queries: Dict,
+    search_results: Dict,
+    recommendations: Dict
+) -> Dict:
+    """Row values for one recommendation session"""
+    return {
+        "session_id": uuid.UUID(session_id) if isinstance(session_id, str) else session_id,
+        "search_queries": search_queries,
+        "search_results": search_results,
+        "recommendations": recommendations,
+        "timestamp": datetime.utcnow()
+    }
+
 # New function to save recommendation session
+@traced("db.save_recommendation_session")
 async def save_recommendation_session(
     session_id: str,
     search_queries: Dict,
@@ -86,49 +287,51 @@ async def save_recommendation_session(
     recommendations: Dict,
     db: AsyncSession
 ) -> Optional[Dict]:
-    """Save recommendation session data and return saved data"""
+    """Upsert recommendation session data in one statement and return saved data"""
     try:
-        session_uuid = uuid.UUID(session_id) if isinstance(session_id, str) else session_id
-        
-        # Check if recommendation session exists
-        stmt = select(RecommendationSession).where(
-            RecommendationSession.session_id == session_uuid
-        )
-        result = await db.execute(stmt)
-        existing_rec_session = result.scalar_one_or_none()
-        
-        if existing_rec_session:
-            # Update existing session
-            existing_rec_session.search_queries = search_queries
-            existing_rec_session.search_results = search_results
-            existing_rec_session.recommendations = recommendations
-            existing_rec_session.timestamp = datetime.utcnow()
-            saved_session = existing_rec_session
-        else:
-            # Create new session
-            new_rec_session = RecommendationSession(
-                session_id=session_uuid,
-                search_queries=search_queries,
-                search_results=search_results,
-                recommendations=recommendations
-            )
-            db.add(new_rec_session)
-            saved_session = new_rec_session
-        
+        result = await db.execute(_recommendation_upsert([
+            _recommendation_values(session_id, search_queries, search_results, recommendations)
+        ]))
+        saved_session = result.one()
         await db.commit()
-        await db.refresh(saved_session)
+        return recommendation_payload(saved_session)
 
-        return {
-            "session_id": str(saved_session.session_id),
-            "recommendations": saved_session.recommendations,
-            "timestamp": saved_session.timestamp.isoformat()
-        }
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+@traced("db.save_recommendation_sessions")
+async def save_recommendation_sessions(records: List[Dict], db: AsyncSession) -> List[Dict]:
+    """
+    Upsert many recommendation sessions in one statement
+    
+    Args:
+        records: Dicts with session_id, search_queries, search_results and recommendations
+    
+    Returns:
+        Saved data for each distinct session_id
+    """
+    if not records:
+        return []
+    set_attributes(**{"db.batch_size": len(records)})
+    try:
+        # A single INSERT ... ON CONFLICT cannot touch the same row twice; keep the latest record
+        latest = {}
+        for record in records:
+            values = _recommendation_values(**record)
+            latest[values["session_id"]] = values
+
+        result = await db.execute(_recommendation_upsert(list(latest.values())))
+        saved_sessions = result.all()
+        await db.commit()
+        return [recommendation_payload(saved_session) for saved_session in saved_sessions]
 
     except Exception as e:
         await db.rollback()
         raise e
 
 # Get recommendation session with verification
+@traced("db.get_verified_recommendation_session")
 async def get_verified_recommendation_session(
     session_id: str,
     db: AsyncSession
@@ -137,28 +340,9 @@ async def get_verified_recommendation_session(
     Retrieve verified recommendation session data
     Returns: (recommendation_data, error_message)
     """
-    try:
-        # First verify the session
-        is_valid, error_message, _ = await verify_session(session_id, db)
-        if not is_valid:
-            return None, error_message
-
-        # Get recommendation data
-        session_uuid = uuid.UUID(session_id)
-        stmt = select(RecommendationSession).where(
-            RecommendationSession.session_id == session_uuid
-        )
-        result = await db.execute(stmt)
-        rec_session = result.scalar_one_or_none()
-        
-        if rec_session:
-            return {
-                "session_id": str(rec_session.session_id),
-                "recommendations": rec_session.recommendations,
-                "timestamp": rec_session.timestamp.isoformat()
-            }, None
-
-        return None, "No recommendations found for this session"
-
-    except Exception as e:
-        return None, f"Error retrieving recommendations: {str(e)}"
\ No newline at end of file
+    is_valid, error_message, _, recommendation_data = await lookup_session(session_id, db)
+    if not is_valid:
+        return None, error_message
+    if recommendation_data:
+        return recommendation_data, None
+    return None, "No recommendations found for this session"
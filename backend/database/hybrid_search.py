@@ -0,0 +1,139 @@
+# database/hybrid_search.py
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Dict, List
+from .vector_store import distance_expression
+import config
+
+# Dense KNN and full-text candidates are ranked per query inside LATERAL joins,
+# fused with reciprocal rank fusion (sum of 1 / (k + rank)) and deduplicated by
+# node_id, so one statement answers a whole batch of queries.
+HYBRID_QUERY_TEMPLATE = """
+WITH q AS (
+    SELECT ord, qtext, CAST(qvec AS vector) AS qvec
+    FROM unnest(CAST(:texts AS text[]), CAST(:vectors AS text[])) WITH ORDINALITY AS t(qtext, qvec, ord)
+),
+dense AS (
+    SELECT q.ord, d.node_id, d.text,
+           row_number() OVER (PARTITION BY q.ord ORDER BY d.distance) AS rank
+    FROM q CROSS JOIN LATERAL (
+        SELECT node_id, text, {distance} AS distance
+        FROM {table}
+        ORDER BY {distance}
+        LIMIT :candidate_k
+    ) d
+),
+sparse AS (
+    SELECT q.ord, s.node_id, s.text,
+           row_number() OVER (PARTITION BY q.ord ORDER BY s.score DESC) AS rank
+    FROM q CROSS JOIN LATERAL (
+        SELECT node_id, text, ts_rank(text_search_tsv, tsq) AS score
+        FROM {table},
+             to_tsquery(
+                 CAST(:ts_config AS regconfig),
+                 replace(CAST(plainto_tsquery(CAST(:ts_config AS regconfig), q.qtext) AS text), '&', '|')
+             ) AS tsq
+        WHERE text_search_tsv @@ tsq
+        ORDER BY score DESC
+        LIMIT :candidate_k
+    ) s
+),
+fused AS (
+    SELECT ord, node_id, max(text) AS text, sum(1.0 / (:rrf_k + rank)) AS score
+    FROM (
+        SELECT ord, node_id, text, rank FROM dense
+        UNION ALL
+        SELECT ord, node_id, text, rank FROM sparse
+    ) candidates
+    GROUP BY ord, node_id
+),
+ranked AS (
+    SELECT ord, node_id, text, score,
+           row_number() OVER (PARTITION BY ord ORDER BY score DESC, node_id) AS position
+    FROM fused
+)
+SELECT ord, node_id, text, score
+FROM ranked
+WHERE position <= :top_k
+ORDER BY ord, position
+"""
+
+def format_vector(embedding: List[float]) -> str:
+    """Render an embedding as a pgvector text literal"""
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+class HybridRetriever:
+    """Hybrid (vector + full-text) retrieval over a PGVectorStore table in one SQL round trip"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        table_name: str = "alumni_records",
+        schema_name: str = "public",
+        text_search_config: str = "english",
+        embed_dim: int = config.EMBED_DIM,
+        vector_storage: str = config.VECTOR_STORAGE,
+        top_k: int = 5,
+        candidate_k: int = 20,
+        rrf_k: int = 60
+    ):
+        """
+        Args:
+            engine: Async engine connected to the vector database
+            table_name: Table name as passed to PGVectorStore (stored as data_<table_name>)
+            text_search_config: Postgres text search configuration used for text_search_tsv
+            embed_dim: Dimension of the stored embeddings
+            vector_storage: "vector" or "halfvec"; must match the table's HNSW index
+            top_k: Results returned per query after fusion
+            candidate_k: Candidates taken from each of the dense and sparse rankings
+            rrf_k: Reciprocal rank fusion damping constant
+        """
+        self.engine = engine
+        self.text_search_config = text_search_config
+        self.embed_dim = embed_dim
+        self.vector_storage = vector_storage
+        self.top_k = top_k
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+
+        preparer = engine.dialect.identifier_preparer
+        self.table = f"{preparer.quote_schema(schema_name)}.{preparer.quote(f'data_{table_name}')}"
+        self._statement = text(HYBRID_QUERY_TEMPLATE.format(
+            table=self.table,
+            distance=self._distance_expression()
+        ))
+
+    def _distance_expression(self) -> str:
+        """Cosine distance between the stored embedding and the query vector"""
+        return distance_expression(self.embed_dim, self.vector_storage)
+
+    async def aretrieve_batch(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Dict]]:
+        """
+        Retrieve fused results for a batch of queries.
+
+        Returns:
+            One list per query (in input order) of {"node_id", "text", "score"} dicts,
+            best first, with each node appearing at most once.
+        """
+        if not queries:
+            return []
+
+        async with self.engine.connect() as conn:
+            result = await conn.execute(self._statement, {
+                "texts": list(queries),
+                "vectors": [format_vector(embedding) for embedding in embeddings],
+                "ts_config": self.text_search_config,
+                "candidate_k": self.candidate_k,
+                "rrf_k": self.rrf_k,
+                "top_k": self.top_k
+            })
+            rows = result.fetchall()
+
+        results: List[List[Dict]] = [[] for _ in queries]
+        for row in rows:
+            results[row.ord - 1].append({
+                "node_id": row.node_id,
+                "text": row.text,
+                "score": float(row.score)
+            })
+        return results
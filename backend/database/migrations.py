@@ -0,0 +1,145 @@
+# database/migrations.py
+"""
+Versioned schema migrations for the session tables.
+
+``Base.metadata.create_all`` only creates missing tables, so changes to existing
+tables are applied here in order and recorded in ``schema_migrations``. Every
+statement is idempotent, so fresh databases created by ``create_all`` pass through
+the same path. Run manually from the backend directory:
+
+    python -m database.migrations upgrade
+    python -m database.migrations downgrade 0001_jsonb_payloads
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Arbitrary key so concurrently starting workers apply migrations one at a time
+MIGRATION_LOCK_KEY = 5057001
+
+@dataclass
+class Migration:
+    version: str
+    description: str
+    upgrade: List[str]
+    downgrade: List[str] = field(default_factory=list)
+
+def convert_column(table: str, column: str, from_type: str, to_type: str) -> str:
+    """ALTER COLUMN ... TYPE, skipped when the column already has the target type"""
+    return f"""
+DO $$ BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = '{table}'
+          AND column_name = '{column}') = '{from_type}' THEN
+        ALTER TABLE {table} ALTER COLUMN {column} TYPE {to_type} USING {column}::{to_type};
+    END IF;
+END $$;
+"""
+
+# lz4 TOAST compression (PostgreSQL 14+ built with lz4) is faster than the default pglz
+# for large JSON documents; older servers keep pglz.
+LZ4_SEARCH_RESULTS = """
+DO $$ BEGIN
+    IF EXISTS (SELECT 1 FROM pg_settings
+               WHERE name = 'default_toast_compression' AND 'lz4' = ANY(enumvals)) THEN
+        ALTER TABLE recommendation_sessions ALTER COLUMN search_results SET COMPRESSION lz4;
+    END IF;
+END $$;
+"""
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version="0001_jsonb_payloads",
+        description="JSON payload columns to JSONB, lz4 for search_results",
+        upgrade=[
+            convert_column("student_information_sessions", "form_data", "json", "jsonb"),
+            convert_column("recommendation_sessions", "search_queries", "json", "jsonb"),
+            convert_column("recommendation_sessions", "search_results", "json", "jsonb"),
+            convert_column("recommendation_sessions", "recommendations", "json", "jsonb"),
+            LZ4_SEARCH_RESULTS,
+        ],
+        downgrade=[
+            convert_column("student_information_sessions", "form_data", "jsonb", "json"),
+            convert_column("recommendation_sessions", "search_queries", "jsonb", "json"),
+            convert_column("recommendation_sessions", "search_results", "jsonb", "json"),
+            convert_column("recommendation_sessions", "recommendations", "jsonb", "json"),
+        ],
+    ),
+    Migration(
+        version="0002_timestamp_indexes",
+        description="Indexes on session timestamps for expiry checks and the retention reaper",
+        upgrade=[
+            "CREATE INDEX IF NOT EXISTS ix_student_information_sessions_timestamp "
+            "ON student_information_sessions (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_recommendation_sessions_timestamp "
+            "ON recommendation_sessions (timestamp)",
+        ],
+        downgrade=[
+            "DROP INDEX IF EXISTS ix_recommendation_sessions_timestamp",
+            "DROP INDEX IF EXISTS ix_student_information_sessions_timestamp",
+        ],
+    ),
+]
+
+async def _applied_versions(conn: AsyncConnection) -> List[str]:
+    await conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+    )
+    result = await conn.exec_driver_sql("SELECT version FROM schema_migrations")
+    return [row[0] for row in result]
+
+async def run_migrations(conn: AsyncConnection) -> List[str]:
+    """Apply pending migrations inside the caller's transaction; returns the versions applied"""
+    await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_KEY})")
+    applied = set(await _applied_versions(conn))
+    newly_applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        for statement in migration.upgrade:
+            await conn.exec_driver_sql(statement)
+        await conn.exec_driver_sql(
+            f"INSERT INTO schema_migrations (version) VALUES ('{migration.version}')"
+        )
+        newly_applied.append(migration.version)
+    return newly_applied
+
+async def downgrade(conn: AsyncConnection, target: Optional[str] = None) -> List[str]:
+    """Revert applied migrations newer than ``target`` (all of them when target is None)"""
+    await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_KEY})")
+    applied = set(await _applied_versions(conn))
+    reverted = []
+    for migration in reversed(MIGRATIONS):
+        if migration.version == target:
+            break
+        if migration.version not in applied:
+            continue
+        for statement in migration.downgrade:
+            await conn.exec_driver_sql(statement)
+        await conn.exec_driver_sql(
+            f"DELETE FROM schema_migrations WHERE version = '{migration.version}'"
+        )
+        reverted.append(migration.version)
+    return reverted
+
+async def main(argv: Optional[List[str]] = None):
+    from .db import engine
+
+    parser = argparse.ArgumentParser(description="Apply or revert session schema migrations")
+    parser.add_argument("command", choices=["upgrade", "downgrade"])
+    parser.add_argument("target", nargs="?", default=None, help="Downgrade: keep migrations up to this version")
+    args = parser.parse_args(argv)
+
+    async with engine.begin() as conn:
+        if args.command == "upgrade":
+            versions = await run_migrations(conn)
+        else:
+            versions = await downgrade(conn, args.target)
+    print(f"{args.command}: {', '.join(versions) or 'nothing to do'}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,8 @@
 # backend/database/models.py
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import uuid
 
@@ -14,9 +14,9 @@ class StudentSession(Base):
 
     id = Column(Integer, primary_key=True)
     session_id = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, index=True)
-    form_data = Column(JSON)  # Store raw form input
+    form_data = Column(JSONB)  # Store raw form input
     profile_summary = Column(String)  # Store generated profile summary
-    timestamp  = Column(DateTime, default=datetime.utcnow)
+    timestamp  = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationship to recommendation sessions
     recommendations = relationship("RecommendationSession", back_populates="student_session", uselist=False)
@@ -27,10 +27,21 @@ class RecommendationSession(Base):
 
     id = Column(Integer, primary_key=True)
     session_id = Column(UUID(as_uuid=True), ForeignKey("student_information_sessions.session_id"), unique=True, index=True)
-    search_queries = Column(JSON)  # Store both DB and internet queries
-    search_results = Column(JSON)  # Store combined_responses
-    recommendations = Column(JSON)  # Store final recommendations
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    search_queries = Column(JSONB)  # Store both DB and internet queries
+    # Store combined_responses; bulky raw context, only loaded when accessed
+    search_results = deferred(Column(JSONB))
+    recommendations = Column(JSONB)  # Store final recommendations
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationship to student session
-    student_session = relationship("StudentSession", back_populates="recommendations")
\ No newline at end of file
+    student_session = relationship("StudentSession", back_populates="recommendations")
+
+class CacheEntry(Base):
+    """Model for shared cache entries (generated queries, search answers, pipeline results)"""
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(JSONB)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)  # NULL never expires
@@ -0,0 +1,163 @@
+# database/persistence.py
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import sessionmaker
+from typing import Dict, List, Optional
+import asyncio
+import random
+from .db import AsyncSessionLocal, save_recommendation_sessions
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Failures caused by one record's content; retrying the same statement cannot help
+RECORD_ERRORS = (IntegrityError, DataError)
+
+class RecommendationWriter:
+    """
+    Write-behind persistence for generated recommendations.
+
+    Websocket handlers enqueue records and return immediately; a single worker task
+    drains the queue in batches, retries transient failures with jittered backoff
+    within a per-batch time budget, and is drained on shutdown so accepted records are not lost on a graceful stop.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = AsyncSessionLocal,
+        batch_size: int = config.PERSIST_BATCH_SIZE,
+        flush_interval: float = config.PERSIST_FLUSH_INTERVAL,
+        max_retries: int = config.PERSIST_MAX_RETRIES,
+        retry_base_delay: float = config.PERSIST_RETRY_BASE_DELAY,
+        max_retry_time: float = config.PERSIST_MAX_RETRY_TIME,
+        max_queue_size: int = config.PERSIST_QUEUE_SIZE
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.max_retry_time = max_retry_time
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "saved": 0, "failed": 0, "rejected": 0}
+
+    def start(self):
+        """Start the background worker (call from the app lifespan)"""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(
+        self,
+        session_id: str,
+        search_queries: Dict,
+        search_results: Dict,
+        recommendations: Dict
+    ) -> bool:
+        """Queue a recommendation session for saving; returns False if it could not be accepted"""
+        if self._queue is None or self._worker is None or self._worker.done():
+            self.stats["rejected"] += 1
+            logger.error("Recommendation writer is not running; dropping save for session %s", session_id)
+            return False
+        try:
+            self._queue.put_nowait({
+                "session_id": session_id,
+                "search_queries": search_queries,
+                "search_results": search_results,
+                "recommendations": recommendations
+            })
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            logger.error("Recommendation write queue is full; dropping save for session %s", session_id)
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Records waiting to be written"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def stop(self, timeout: float = config.PERSIST_DRAIN_TIMEOUT):
+        """Flush everything already queued, then stop the worker"""
+        if self._worker is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            # Sentinel: the worker exits once it reaches it. Queueing it waits for room
+            # when the queue is full, so it shares the drain deadline
+            await asyncio.wait_for(self._queue.put(None), timeout=timeout)
+            await asyncio.wait_for(asyncio.shield(self._worker), timeout=max(0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            logger.error("Recommendation writer did not drain within %ss; %s records lost", timeout, self.pending)
+            self._worker.cancel()
+        self._worker = None
+
+    async def _run(self):
+        """Collect batches (up to batch_size or flush_interval) and flush them"""
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._flush_with_retry(batch)
+
+    async def _flush_with_retry(self, batch: List[Dict]):
+        """
+        Write a batch. Connection and other transient errors retry the whole batch
+        with jittered exponential backoff, within ``max_retry_time``; record errors
+        (constraint or data) are not retried but split the batch so the other
+        records are still saved.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempts = 0
+        last_error = None
+        while True:
+            attempts += 1
+            try:
+                await self._flush(batch)
+                self.stats["saved"] += len(batch)
+                return
+            except RECORD_ERRORS as e:
+                if len(batch) > 1:
+                    # One bad record (e.g. a session deleted meanwhile) fails the whole statement
+                    for record in batch:
+                        await self._flush_with_retry([record])
+                    return
+                last_error = e
+                break
+            except Exception as e:
+                last_error = e
+                delay = random.uniform(0, self.retry_base_delay * (2 ** (attempts - 1)))
+                if attempts > self.max_retries or loop.time() - started + delay > self.max_retry_time:
+                    break
+                await asyncio.sleep(delay)
+
+        self.stats["failed"] += len(batch)
+        logger.error(
+            "Background save failed after %d attempt(s) for %d record(s), sessions %s: %s",
+            attempts, len(batch), ", ".join(str(record["session_id"]) for record in batch), last_error
+        )
+
+    async def _flush(self, batch: List[Dict]):
+        """Write one batch with a single upsert statement"""
+        async with self.session_factory() as db:
+            await save_recommendation_sessions(batch, db)
@@ -0,0 +1,218 @@
+# database/retention.py
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import asyncio
+from .db import engine as default_engine
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Archive tables mirror the live tables but are range-partitioned by month on timestamp,
+# so old data is removed with DROP TABLE instead of row-by-row deletes. The live tables
+# stay unpartitioned: their unique session_id and foreign key cannot include timestamp.
+ARCHIVE_TABLES = {
+    "student_information_sessions_archive": """
+        CREATE TABLE IF NOT EXISTS student_information_sessions_archive (
+            id INTEGER,
+            session_id UUID,
+            form_data JSONB,
+            profile_summary VARCHAR,
+            timestamp TIMESTAMP NOT NULL,
+            archived_at TIMESTAMP NOT NULL DEFAULT now()
+        ) PARTITION BY RANGE (timestamp)
+    """,
+    "recommendation_sessions_archive": """
+        CREATE TABLE IF NOT EXISTS recommendation_sessions_archive (
+            id INTEGER,
+            session_id UUID,
+            search_queries JSONB,
+            search_results JSONB,
+            recommendations JSONB,
+            timestamp TIMESTAMP NOT NULL,
+            archived_at TIMESTAMP NOT NULL DEFAULT now()
+        ) PARTITION BY RANGE (timestamp)
+    """,
+}
+
+# Both tables are cleared in one statement: NO ACTION foreign keys are checked at the end of
+# the statement, and SKIP LOCKED keeps the reaper off rows a request is still writing.
+REAP_TEMPLATE = """
+WITH expired AS (
+    SELECT session_id FROM student_information_sessions
+    WHERE timestamp < :cutoff
+    ORDER BY timestamp
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+),
+removed_recommendations AS (
+    DELETE FROM recommendation_sessions r USING expired e
+    WHERE r.session_id = e.session_id
+    RETURNING r.id, r.session_id, r.search_queries, r.search_results, r.recommendations, r.timestamp
+),
+removed_sessions AS (
+    DELETE FROM student_information_sessions s USING expired e
+    WHERE s.session_id = e.session_id
+    RETURNING s.id, s.session_id, s.form_data, s.profile_summary, s.timestamp
+){archive}
+SELECT (SELECT count(*) FROM removed_sessions) AS sessions,
+       (SELECT count(*) FROM removed_recommendations) AS recommendations
+"""
+
+ARCHIVE_CTES = """,
+archived_recommendations AS (
+    INSERT INTO recommendation_sessions_archive
+        (id, session_id, search_queries, search_results, recommendations, timestamp)
+    SELECT id, session_id, search_queries, search_results, recommendations, coalesce(timestamp, now() AT TIME ZONE 'utc')
+    FROM removed_recommendations
+),
+archived_sessions AS (
+    INSERT INTO student_information_sessions_archive
+        (id, session_id, form_data, profile_summary, timestamp)
+    SELECT id, session_id, form_data, profile_summary, coalesce(timestamp, now() AT TIME ZONE 'utc')
+    FROM removed_sessions
+)"""
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+def next_month(moment: datetime) -> datetime:
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+async def ensure_archive_partitions(conn: AsyncConnection, oldest: datetime, newest: datetime):
+    """Create the archive tables and one partition per month between oldest and newest"""
+    for table, ddl in ARCHIVE_TABLES.items():
+        await conn.exec_driver_sql(ddl)
+        month = month_start(oldest)
+        while month <= newest:
+            upper = next_month(month)
+            await conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            )
+            month = upper
+
+async def drop_archive_partitions(conn: AsyncConnection, keep_months: int) -> List[str]:
+    """Drop archive partitions whose whole month is older than keep_months"""
+    threshold = month_start(datetime.utcnow())
+    for _ in range(keep_months):
+        threshold = month_start(threshold - timedelta(days=1))
+    dropped = []
+    for table in ARCHIVE_TABLES:
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ), {"table": table})
+        for (name,) in result:
+            try:
+                month = datetime.strptime(name.rsplit("_p", 1)[1], "%Y%m")
+            except (IndexError, ValueError):
+                continue
+            if next_month(month) <= threshold:
+                await conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+                dropped.append(name)
+    return dropped
+
+class SessionReaper:
+    """
+    Background retention for session tables.
+
+    Every interval, sessions older than the retention period are deleted (or moved to
+    the partitioned archive) in bounded batches, one short transaction per batch.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = default_engine,
+        retention: timedelta = timedelta(hours=config.SESSION_RETENTION_HOURS),
+        interval: float = config.REAPER_INTERVAL_SECONDS,
+        batch_size: int = config.REAPER_BATCH_SIZE,
+        max_batches: int = config.REAPER_MAX_BATCHES,
+        archive: bool = config.SESSION_ARCHIVE,
+        archive_retention_months: int = config.ARCHIVE_RETENTION_MONTHS
+    ):
+        # Never reap sessions clients can still use
+        self.retention = max(retention, timedelta(minutes=config.SESSION_TTL_MINUTES))
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.archive = archive
+        self.archive_retention_months = archive_retention_months
+        self._statement = text(REAP_TEMPLATE.format(archive=ARCHIVE_CTES if archive else ""))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the periodic reaper (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the periodic reaper; an in-flight batch transaction is rolled back"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                stats = await self.reap_once()
+                if stats["sessions"] or stats["cache_entries"] or stats["dropped_partitions"]:
+                    logger.info("Session reaper: %s", stats)
+            except Exception as e:
+                logger.exception("Session reaper failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def _reap_batch(self, cutoff: datetime) -> Tuple[int, int]:
+        async with self.engine.begin() as conn:
+            if self.archive:
+                oldest = (await conn.execute(text(
+                    "SELECT min(timestamp) FROM student_information_sessions WHERE timestamp < :cutoff"
+                ), {"cutoff": cutoff})).scalar()
+                if oldest is None:
+                    return 0, 0
+                # Recommendations can be stamped later than their session, up to now
+                await ensure_archive_partitions(conn, oldest, datetime.utcnow())
+            row = (await conn.execute(self._statement, {
+                "cutoff": cutoff,
+                "batch_size": self.batch_size
+            })).one()
+            return row.sessions, row.recommendations
+
+    async def reap_once(self) -> Dict:
+        """Run up to max_batches batches per table; returns how many rows were removed"""
+        cutoff = datetime.utcnow() - self.retention
+        stats = {"sessions": 0, "recommendations": 0, "cache_entries": 0, "dropped_partitions": []}
+        for _ in range(self.max_batches):
+            sessions, recommendations = await self._reap_batch(cutoff)
+            stats["sessions"] += sessions
+            stats["recommendations"] += recommendations
+            if sessions < self.batch_size:
+                break
+        stats["cache_entries"] = await self._purge_cache_entries()
+        if self.archive:
+            async with self.engine.begin() as conn:
+                stats["dropped_partitions"] = await drop_archive_partitions(conn, self.archive_retention_months)
+        return stats
+
+    async def _purge_cache_entries(self) -> int:
+        """Delete expired shared cache entries in bounded batches"""
+        purged = 0
+        for _ in range(self.max_batches):
+            async with self.engine.begin() as conn:
+                result = await conn.execute(text(
+                    "DELETE FROM cache_entries WHERE ctid IN ("
+                    "SELECT ctid FROM cache_entries WHERE expires_at < :now LIMIT :batch_size)"
+                ), {"now": datetime.utcnow(), "batch_size": self.batch_size})
+            purged += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+        return purged
@@ -0,0 +1,102 @@
+# database/vector_store.py
+from sqlalchemy import URL
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.vector_stores.postgres import PGVectorStore
+from typing import Dict, Optional
+import config
+
+# Native output size of the OpenAI embedding models we use
+NATIVE_EMBED_DIMS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+}
+
+# pgvector's HNSW/IVFFlat dimension limits per storage type
+MAX_INDEXABLE_DIMS = {
+    "vector": 2000,
+    "halfvec": 4000,
+}
+
+def build_embedding_model(
+    model: str = config.EMBED_MODEL,
+    embed_dim: int = config.EMBED_DIM
+) -> OpenAIEmbedding:
+    """Create the embedding model, truncating output when a smaller dimension is configured"""
+    if embed_dim < NATIVE_EMBED_DIMS.get(model, embed_dim):
+        # text-embedding-3 models are Matryoshka-trained, the API truncates and renormalizes
+        return OpenAIEmbedding(model=model, dimensions=embed_dim)
+    return OpenAIEmbedding(model=model)
+
+def is_ann_indexable(embed_dim: int, storage: str) -> bool:
+    """Whether pgvector can build an HNSW index for this dimension and storage type"""
+    return embed_dim <= MAX_INDEXABLE_DIMS.get(storage, 0)
+
+def hnsw_index_name(table_name: str) -> str:
+    """Index name shared with PGVectorStore's own hnsw_kwargs setup"""
+    return f"data_{table_name}_embedding_idx"
+
+def hnsw_index_ddl(
+    table_name: str,
+    embed_dim: int,
+    storage: str,
+    schema_name: str = "public"
+) -> str:
+    """CREATE INDEX statement for an HNSW cosine index over the embedding column"""
+    if not is_ann_indexable(embed_dim, storage):
+        raise ValueError(
+            f"{embed_dim}-dim embeddings cannot be HNSW-indexed as {storage}; "
+            f"use halfvec (<= 4000 dims) or a truncated dimension (<= 2000 dims)"
+        )
+    if storage == "halfvec":
+        # Expression index: the column keeps full precision, the index stores half precision
+        column = f"(CAST(embedding AS halfvec({embed_dim}))) halfvec_cosine_ops"
+    else:
+        column = "embedding vector_cosine_ops"
+    return (
+        f'CREATE INDEX IF NOT EXISTS "{hnsw_index_name(table_name)}" '
+        f'ON "{schema_name}"."data_{table_name}" USING hnsw ({column}) '
+        f"WITH (m = {config.HNSW_M}, ef_construction = {config.HNSW_EF_CONSTRUCTION})"
+    )
+
+def distance_expression(embed_dim: int, storage: str, query: str = "q.qvec") -> str:
+    """SQL cosine distance between the stored embedding and a query vector, matching the index"""
+    if storage == "halfvec":
+        return f"CAST(embedding AS halfvec({embed_dim})) <=> CAST({query} AS halfvec({embed_dim}))"
+    return f"embedding <=> {query}"
+
+def build_vector_store(
+    url: URL,
+    database: str = config.VECTOR_DB_NAME,
+    table_name: str = config.ALUMNI_TABLE_NAME,
+    embed_dim: int = config.EMBED_DIM,
+    storage: str = config.VECTOR_STORAGE,
+    create_index: bool = True,
+    create_engine_kwargs: Optional[Dict] = None
+) -> PGVectorStore:
+    """Create the alumni PGVectorStore; plain vector columns get an HNSW index when indexable"""
+    hnsw_kwargs: Optional[Dict] = None
+    if create_index and storage == "vector" and is_ann_indexable(embed_dim, storage):
+        hnsw_kwargs = {
+            "hnsw_m": config.HNSW_M,
+            "hnsw_ef_construction": config.HNSW_EF_CONSTRUCTION,
+            "hnsw_ef_search": config.HNSW_EF_SEARCH,
+            "hnsw_dist_method": "vector_cosine_ops",
+        }
+    # halfvec indexes are expression indexes, created by tools/migrate_embeddings.py
+    return PGVectorStore.from_params(
+        database=database,
+        host=url.host,
+        password=url.password,
+        port=url.port,
+        user=url.username,
+        table_name=table_name,
+        embed_dim=embed_dim,
+        hybrid_search=True,
+        text_search_config="english",
+        hnsw_kwargs=hnsw_kwargs,
+        create_engine_kwargs=create_engine_kwargs,
+    )
+
+def ensure_vector_table(store: PGVectorStore) -> None:
+    """Create the store's extension, table and index if missing (add() runs that setup first)"""
+    store.add([])
@@ -147,6 +147,42 @@ QuickView: Title: *AI Research Path*, Summary: *Student aligns with alumni caree
 """)
 
 
+### Typed Recommendation (one pathway type per call, used by the fan-out mode)
+typed_recommendation_template = PromptTemplate("""
+You are an AI academic advisor assistant helping advisors suggest academic pathways to students. 
+
+### Task:
+Generate **{count} {pathway_description}** (type "{recommendation_type}").
+
+### Guidelines:
+- Use advisor-friendly language; refer to "the student" (not "you").
+- Focus on actionable pathways with clear career outcomes.
+- Base suggestions strictly on provided data; avoid assumptions.
+
+### Input:
+**Student Profile:**  
+{context}
+
+**{evidence_label}:**  
+{evidence}
+
+### Content Requirements:
+Each pathway must include:  
+1. **QuickView**:  
+   - Title (concise pathway name)  
+   - Summary (2-3 sentences analyzing fit)  
+   - Key Points (3 critical considerations)  
+   - Next Step (specific action for the advisor)  
+
+2. **DetailedView**:  
+   - Reasoning (why this pathway aligns with the student)  
+   - Evidence:  
+       - Alumni Patterns (examples from alumni data, or "N/A" if none were provided)  
+       - Industry Context (supporting trends/insights, or "N/A" if none were provided)  
+   - Discussion Points (3 actionable topics for advisor-student conversation)
+""")
+
+
 
 
 # recommendation_template = PromptTemplate("""
@@ -0,0 +1,225 @@
+# tools/benchmark.py
+"""
+Offline latency/throughput benchmark of the advising pipeline.
+
+Runs ProfileAgent -> SearchAgent.execute_combined_search -> RecommendationAgent
+against the deterministic fakes in tools.fakes, so results are reproducible and
+need no network access. Run from the backend directory:
+
+    python -m tools.benchmark --concurrency 1,8,32 --requests 64
+    python -m tools.benchmark --mode fanout --stream --llm-latency lognormal:0.8:0.3
+    python -m tools.benchmark --concurrency 1,8 --time-scale 0.05 --max-p95-ms 2000 --output bench.json   # CI gate
+
+Runs whose search stage lost a side (timeout or failure) still finish and are
+reported as ``degraded``; the p95 gate fails on errors and degraded runs alike.
+At the default Tavily rate (2/s) the internet side saturates around a dozen
+concurrent pipelines, which is why the gate stops at 8; pass --tavily-rate 0
+to take the limiter out of the picture.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from agents.profile_agent import ProfileAgent, StudentInfo
+from agents.recommendation_agent import RecommendationAgent
+from agents.search_agent import SearchAgent
+from agents.tavily_scheduler import TavilySearchScheduler
+from tools.fakes import (
+    FakeEmbedding,
+    FakeHybridRetriever,
+    FakeLLM,
+    FakeOpenAI,
+    FakeTavily,
+    FIELDS,
+    Latency,
+)
+from utils.stats import summarize_latencies
+import config
+
+STAGES = ("profile", "search", "recommendation", "total")
+
+def sample_student(i: int) -> StudentInfo:
+    field = FIELDS[i % len(FIELDS)]
+    return StudentInfo(
+        academic_interests=f"{field} and statistics",
+        career_paths=f"Research or industry roles in {field}",
+        course_preferences="Enjoys project courses, dislikes rote memorization",
+        experience=f"Summer internship in {field}",
+        skills="Python, data analysis",
+        extracurriculars="Robotics club",
+        decision_factors="Impact and salary",
+        advisor_notes=f"Student {i}"
+    )
+
+class PipelineBench:
+    """Agents wired to fakes, with per-stage timings for every request"""
+
+    def __init__(self, args: argparse.Namespace):
+        def latency(spec: str, offset: int) -> Latency:
+            return Latency(spec, seed=args.seed + offset, scale=args.time_scale)
+
+        llm = FakeLLM(latency(args.llm_latency, 1), latency(args.token_latency, 2))
+        tavily = FakeTavily(latency(args.tavily_latency, 3))
+        self.profile_agent = ProfileAgent(llm=llm)
+        # Deadlines and the Tavily rate limit run on the same scaled clock as the
+        # fakes; otherwise a small --time-scale only measures limiter queueing
+        scale = args.time_scale or 1.0
+        self.search_agent = SearchAgent(
+            llm=llm,
+            hybrid_index=None,
+            tavily_client=tavily,
+            embed_model=FakeEmbedding(latency(args.embed_latency, 4)),
+            hybrid_retriever=FakeHybridRetriever(latency(args.db_latency, 5)),
+            search_timeout=45 * scale,
+            stage_timeout=60 * scale
+        )
+        self.search_agent.internet_scheduler.shutdown()
+        self.search_agent.internet_scheduler = TavilySearchScheduler(
+            tavily,
+            rate_per_second=args.tavily_rate / scale,
+            query_timeout=config.TAVILY_QUERY_TIMEOUT * scale,
+            retry_base_delay=config.TAVILY_RETRY_BASE_DELAY * scale
+        )
+        self.recommendation_agent = RecommendationAgent(
+            llm=FakeOpenAI(latency(args.llm_latency, 6), latency(args.token_latency, 7)),
+            execution_mode=args.mode
+        )
+        self.stream = getattr(args, "stream", False)
+        self.tavily = tavily
+
+    async def run_one(self, i: int) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """
+        Returns:
+            (per-stage seconds, search sides that failed while the pipeline still completed)
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        summary = await self.profile_agent.generate_profile_summary(sample_student(i))
+        timings["profile"] = time.perf_counter() - start
+
+        stage = time.perf_counter()
+        search_results = await self.search_agent.execute_combined_search(summary)
+        timings["search"] = time.perf_counter() - stage
+        degraded = search_results["results"].get("errors", {})
+
+        stage = time.perf_counter()
+        if self.stream:
+            recommendations = [
+                rec async for rec in self.recommendation_agent.stream_recommendations(search_results, summary)
+            ]
+        else:
+            response = await self.recommendation_agent.generate_recommendations(search_results, summary)
+            if response.get("status") == "error":
+                raise RuntimeError(response.get("error"))
+            recommendations = response["recommendations"]
+        if not recommendations:
+            raise RuntimeError("No recommendations generated")
+        timings["recommendation"] = time.perf_counter() - stage
+
+        timings["total"] = time.perf_counter() - start
+        return timings, degraded
+
+    async def run_level(self, concurrency: int, requests: int) -> Dict:
+        """Run ``requests`` pipelines with at most ``concurrency`` in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        errors = []
+        degraded: Dict[str, int] = {}
+
+        async def worker(i: int):
+            async with semaphore:
+                try:
+                    timings, failed_sides = await self.run_one(i)
+                except Exception as e:
+                    errors.append(str(e) or type(e).__name__)
+                    return
+                for side in failed_sides:
+                    degraded[side] = degraded.get(side, 0) + 1
+                for stage, value in timings.items():
+                    samples[stage].append(value)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+        return {
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": len(errors),
+            # Completed runs missing one search side (timeout or failure)
+            "degraded": sum(degraded.values()),
+            "degraded_sides": degraded,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(samples["total"]) / elapsed, 3) if elapsed else None,
+            "stages": {stage: summarize_latencies(values) for stage, values in samples.items()},
+        }
+
+def add_fake_args(parser: argparse.ArgumentParser):
+    """Options shaping the fakes behind PipelineBench (shared with tools.loadgen)"""
+    parser.add_argument("--mode", choices=["single", "fanout"], default=config.RECOMMENDATION_MODE)
+    parser.add_argument("--llm-latency", default="lognormal:0.8:0.3", help="Time to first token / full completion")
+    parser.add_argument("--token-latency", default="fixed:0.002", help="Delay per streamed chunk")
+    parser.add_argument("--tavily-latency", default="lognormal:1.5:0.4")
+    parser.add_argument("--embed-latency", default="lognormal:0.15:0.2")
+    parser.add_argument("--db-latency", default="lognormal:0.05:0.3")
+    parser.add_argument("--tavily-rate", type=float, default=config.TAVILY_RATE_PER_SECOND, help="Token bucket rate, 0 disables")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0,
+        help="Multiply every fake latency and search deadline; the Tavily rate is divided by it"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the advising pipeline against local fakes")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Pipelines run per concurrency level")
+    parser.add_argument("--stream", action="store_true", help="Use stream_recommendations instead of generate_recommendations")
+    add_fake_args(parser)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit non-zero when any level's total p95 exceeds this")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    bench = PipelineBench(args)
+    levels = []
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            level = await bench.run_level(concurrency, args.requests)
+            levels.append(level)
+            total = level["stages"]["total"]
+            print(
+                f"concurrency={concurrency} throughput={level['throughput_rps']} rps "
+                f"p50={total.get('p50_ms')}ms p95={total.get('p95_ms')}ms "
+                f"p99={total.get('p99_ms')}ms errors={level['errors']} degraded={level['degraded']}",
+                file=sys.stderr
+            )
+    finally:
+        bench.search_agent.internet_scheduler.shutdown()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "max_p95_ms")},
+        "tavily_calls": bench.tavily.calls,
+        "levels": levels,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.max_p95_ms is not None:
+        slow = [
+            level["concurrency"] for level in levels
+            if level["errors"] or level["degraded"] or level["stages"]["total"].get("p95_ms", float("inf")) > args.max_p95_ms
+        ]
+        if slow:
+            print(f"p95 budget of {args.max_p95_ms}ms exceeded (or errors/degraded runs) at concurrency {slow}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
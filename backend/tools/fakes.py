@@ -0,0 +1,206 @@
+# tools/fakes.py
+"""
+Deterministic local stand-ins for the pipeline's network services.
+
+Each fake reproduces just the client surface the agents use and sleeps for a
+latency drawn from a seeded distribution, so runs are reproducible and need no
+OpenAI, Tavily or Postgres access. Used by tools.benchmark and tools.loadgen.
+"""
+import asyncio
+import hashlib
+import json
+import random
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, List, Optional
+
+FIELDS = [
+    "machine learning", "public health", "climate policy", "robotics", "finance",
+    "neuroscience", "urban planning", "education", "biotech", "game design",
+]
+
+class Latency:
+    """
+    Seeded latency distribution in seconds.
+
+    Specs: ``fixed:0.2``, ``uniform:0.1:0.4`` or ``lognormal:0.5:0.3``
+    (median and sigma). ``scale`` multiplies every sample, so CI can run the
+    same shape faster.
+    """
+
+    def __init__(self, spec: str, seed: int = 0, scale: float = 1.0):
+        kind, *params = spec.split(":")
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self.scale = scale
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = self._random.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            value = median * self._random.lognormvariate(0, sigma)
+        return max(0.0, value * self.scale)
+
+    async def wait(self):
+        await asyncio.sleep(self.sample())
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+def _field_for(text: str) -> str:
+    return FIELDS[_digest(text) % len(FIELDS)]
+
+class FakeLLM:
+    """llama_index-style LLM: ``acomplete`` and ``astream_complete``"""
+
+    def __init__(self, latency: Latency, token_latency: Optional[Latency] = None, model: str = "fake-llm"):
+        self.latency = latency
+        self.token_latency = token_latency or Latency("fixed:0")
+        self.model = model
+
+    def _text(self, prompt: str) -> str:
+        field = _field_for(prompt)
+        return "\n\n".join(
+            f"Find {kind} in {field} relevant to a student focused on {field} ({_digest(prompt) % 1000})"
+            for kind in ("alumni career paths", "trends and opportunities", "notable figures")
+        )
+
+    async def acomplete(self, prompt: str, **kwargs) -> SimpleNamespace:
+        await self.latency.wait()
+        return SimpleNamespace(text=self._text(prompt))
+
+    async def astream_complete(self, prompt: str, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        text = self._text(prompt)
+
+        async def stream():
+            await self.latency.wait()
+            for word in text.split(" "):
+                await self.token_latency.wait()
+                yield SimpleNamespace(delta=word + " ")
+
+        return stream()
+
+def fake_recommendations(seed_text: str, types: Optional[List[str]] = None) -> Dict:
+    """A RecommendationsResponse-shaped payload, by default with the production pathway mix"""
+    field = _field_for(seed_text)
+    types = types or ["alumni", "alumni", "alumni", "trend", "figure"]
+    return {
+        "recommendations": [
+            {
+                "id": i,
+                "type": rec_type,
+                "quickView": {
+                    "title": f"{field.title()} pathway {i}",
+                    "summary": f"A {rec_type}-based pathway into {field}.",
+                    "keyPoints": ["Interest alignment", "Skill fit", "Market demand"],
+                    "nextStep": f"Discuss {field} electives with the student."
+                },
+                "detailedView": {
+                    "reasoning": f"The student's profile points towards {field}.",
+                    "evidence": {"alumniPatterns": "Synthetic alumni", "industryContext": "Synthetic trend"},
+                    "discussionPoints": ["Courses", "Projects", "Mentors"]
+                }
+            }
+            for i, rec_type in enumerate(types, start=1)
+        ]
+    }
+
+class FakeChatCompletions:
+    """``AsyncOpenAI().chat.completions`` with JSON-schema style output and streaming"""
+
+    def __init__(self, latency: Latency, token_latency: Optional[Latency] = None, chunk_size: int = 64):
+        self.latency = latency
+        self.token_latency = token_latency or Latency("fixed:0")
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _schema_types(response_format: Optional[Dict]) -> Optional[List[str]]:
+        """Card types a per-type (fan-out) schema asks for; None for the full mix"""
+        schema = ((response_format or {}).get("json_schema") or {}).get("schema", {})
+        type_enum = schema.get("$defs", {}).get("Recommendation", {}).get("properties", {}).get("type", {}).get("enum")
+        count = schema.get("properties", {}).get("recommendations", {}).get("maxItems")
+        if not type_enum or not count:
+            return None
+        return [type_enum[0]] * count
+
+    async def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        types = self._schema_types(kwargs.get("response_format"))
+        content = json.dumps(fake_recommendations(messages[-1]["content"], types))
+        await self.latency.wait()
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        async def chunks():
+            for start in range(0, len(content), self.chunk_size):
+                await self.token_latency.wait()
+                delta = SimpleNamespace(content=content[start:start + self.chunk_size])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        return chunks()
+
+class FakeOpenAI:
+    """Stand-in for ``AsyncOpenAI`` as used by RecommendationAgent"""
+
+    def __init__(self, latency: Latency, token_latency: Optional[Latency] = None):
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency, token_latency))
+
+class FakeTavily:
+    """Async ``qna_search`` returning a short deterministic answer"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def qna_search(self, query: str, **kwargs) -> str:
+        self.calls += 1
+        await self.latency.wait()
+        return f"Synthetic answer about {_field_for(query)}: demand is growing and skills transfer well."
+
+class FakeEmbedding:
+    """Embedding model with deterministic unit vectors"""
+
+    def __init__(self, latency: Latency, dim: int = 64):
+        self.latency = latency
+        self.dim = dim
+
+    def _vector(self, text: str) -> List[float]:
+        rng = random.Random(_digest(text))
+        vector = [rng.gauss(0, 1) for _ in range(self.dim)]
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        return [x / norm for x in vector]
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        await self.latency.wait()
+        return self._vector(text)
+
+    async def aget_text_embedding_batch(self, texts: List[str], **kwargs) -> List[List[float]]:
+        await self.latency.wait()
+        return [self._vector(text) for text in texts]
+
+class FakeHybridRetriever:
+    """In-memory alumni corpus behind ``HybridRetriever.aretrieve_batch``; one latency per batch, like the single SQL statement"""
+
+    def __init__(self, latency: Latency, corpus_size: int = 500, top_k: int = 5):
+        self.latency = latency
+        self.top_k = top_k
+        self.corpus = [
+            (f"alumni-{i}", f"Alumnus {i} studied {FIELDS[i % len(FIELDS)]} and now works in {FIELDS[(i * 7) % len(FIELDS)]}.")
+            for i in range(corpus_size)
+        ]
+
+    async def aretrieve_batch(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Dict]]:
+        await self.latency.wait()
+        results = []
+        for query in queries:
+            terms = set(query.lower().split())
+            scored = sorted(
+                ((len(terms & set(text.lower().split())), node_id, text) for node_id, text in self.corpus),
+                reverse=True
+            )[:self.top_k]
+            results.append([{"node_id": node_id, "text": text, "score": float(score)} for score, node_id, text in scored])
+        return results
@@ -0,0 +1,340 @@
+# tools/ingest_alumni.py
+"""
+Bulk, resumable ingestion of alumni records into the alumni vector table.
+
+Run from the backend directory:
+
+    python -m tools.ingest_alumni alumni_export.xlsx --id-column "Alumni ID"
+    python -m tools.ingest_alumni alumni.jsonl --write-mode executemany --concurrency 8
+    python -m tools.ingest_alumni alumni.csv --prune   # no stable id: file is the full alumni set
+
+Rows are streamed from CSV, XLSX or JSONL, turned into the "Field: value; ..." node
+text the alumni search expects, and embedded in batches with a bounded number of
+concurrent embedding calls. Each node carries a content hash of its text and the
+embedding settings, so a re-run only re-embeds rows that changed. A checkpoint file
+records how far the source has been committed, so an interrupted run resumes there.
+
+Node ids come from --id-column when given, so an edited row replaces its old
+version. Without it the id is the content hash and an edited row is a new node;
+re-ingesting into a non-empty table then requires --prune, which treats the file
+as the complete alumni set and deletes nodes it no longer produces.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import asyncpg
+from dotenv import load_dotenv
+from pgvector.asyncpg import register_vector
+from sqlalchemy import make_url
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from database.vector_store import build_embedding_model, build_vector_store, ensure_vector_table
+import config
+
+load_dotenv()
+
+# Namespace for deterministic node ids, so re-ingesting a row replaces it instead of duplicating it
+ALUMNI_NODE_NAMESPACE = uuid.UUID("8a7c1f3e-2b4d-4e6f-9a1b-3c5d7e9f0a2b")
+
+def read_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Stream rows from a CSV, XLSX or JSONL file as dicts"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    elif extension in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else "" for cell in next(rows, [])]
+            for values in rows:
+                yield {name: value for name, value in zip(header, values) if name}
+        finally:
+            workbook.close()
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+def format_field_name(field: str) -> str:
+    """'job_title' / 'Job Title' -> 'Job Title'"""
+    return field.replace("_", " ").strip().title()
+
+def build_node_text(row: Dict, text_columns: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> str:
+    """Alumni node text in the 'Major: ...; Degree: ...; Job Title: ...' form the search prompts expect"""
+    columns = text_columns or [column for column in row if column not in (exclude or [])]
+    parts = []
+    for column in columns:
+        value = row.get(column)
+        if value is None or not str(value).strip():
+            continue
+        parts.append(f"{format_field_name(column)}: {' '.join(str(value).split())}")
+    return "; ".join(parts)
+
+def content_hash(node_text: str) -> str:
+    """Hash of everything that determines the stored embedding"""
+    key = f"{config.EMBED_MODEL}|{config.EMBED_DIM}|{node_text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def load_checkpoint(path: str, source: str) -> int:
+    """Number of source rows already committed for this source file"""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    return checkpoint.get("rows_done", 0) if checkpoint.get("source") == os.path.abspath(source) else 0
+
+def save_checkpoint(path: str, source: str, rows_done: int):
+    """Atomically record progress"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"source": os.path.abspath(source), "rows_done": rows_done}, f)
+    os.replace(tmp_path, path)
+
+class AlumniIngestor:
+    """Embeds and writes alumni nodes in batches, skipping rows whose content hash is unchanged"""
+
+    def __init__(
+        self,
+        conn: asyncpg.Connection,
+        table_name: str = config.ALUMNI_TABLE_NAME,
+        batch_size: int = 256,
+        concurrency: int = 4,
+        write_mode: str = "copy"
+    ):
+        self.conn = conn
+        self.table = f"data_{table_name}"
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.write_mode = write_mode
+        self.embed_model = build_embedding_model()
+        self.existing_hashes: Dict[str, str] = {}
+        self.stats = {"read": 0, "skipped": 0, "duplicates": 0, "embedded": 0, "written": 0, "pruned": 0}
+
+    async def load_existing_hashes(self):
+        """node_id -> content_hash for everything already in the table"""
+        rows = await self.conn.fetch(
+            f"SELECT node_id, metadata_->>'content_hash' AS content_hash FROM \"{self.table}\""
+        )
+        self.existing_hashes = {row["node_id"]: row["content_hash"] for row in rows}
+
+    def node_identity(
+        self,
+        row: Dict,
+        id_column: Optional[str],
+        text_columns: Optional[List[str]]
+    ) -> Optional[Tuple[str, str, str]]:
+        """(node_id, node_text, content_hash) for a source row, or None if it has no text"""
+        node_text = build_node_text(row, text_columns, exclude=[id_column] if id_column else None)
+        if not node_text:
+            return None
+        digest = content_hash(node_text)
+        source_key = str(row.get(id_column)) if id_column and row.get(id_column) is not None else digest
+        return str(uuid.uuid5(ALUMNI_NODE_NAMESPACE, source_key)), node_text, digest
+
+    def build_node(self, row: Dict, id_column: Optional[str], text_columns: Optional[List[str]]) -> Optional[TextNode]:
+        """Turn a source row into a TextNode, or None if it is empty or unchanged"""
+        identity = self.node_identity(row, id_column, text_columns)
+        if identity is None:
+            return None
+        node_id, node_text, digest = identity
+        if self.existing_hashes.get(node_id) == digest:
+            return None
+        metadata = {
+            format_field_name(key): str(value)
+            for key, value in row.items()
+            if value is not None and str(value).strip()
+        }
+        metadata["content_hash"] = digest
+        node = TextNode(id_=node_id, text=node_text, metadata=metadata)
+        # Row fields are kept for filtering; the embedding comes from the node text alone
+        node.excluded_embed_metadata_keys = list(metadata)
+        node.excluded_llm_metadata_keys = list(metadata)
+        return node
+
+    async def embed_batches(self, batches: List[List[TextNode]]):
+        """Embed several batches concurrently, bounded by self.concurrency"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def embed(batch: List[TextNode]):
+            async with semaphore:
+                embeddings = await self.embed_model.aget_text_embedding_batch([node.text for node in batch])
+            for node, embedding in zip(batch, embeddings):
+                node.embedding = embedding
+
+        await asyncio.gather(*(embed(batch) for batch in batches if batch))
+
+    async def write(self, nodes: List[TextNode]):
+        """Replace any previous version of these nodes and insert the new ones in one transaction"""
+        if not nodes:
+            return
+        records = [
+            (
+                node.text,
+                json.dumps(node_to_metadata_dict(node, remove_text=True, flat_metadata=False)),
+                node.node_id,
+                node.embedding,
+            )
+            for node in nodes
+        ]
+        async with self.conn.transaction():
+            await self.conn.execute(
+                f'DELETE FROM "{self.table}" WHERE node_id = ANY($1::varchar[])',
+                [node.node_id for node in nodes]
+            )
+            if self.write_mode == "copy":
+                await self.conn.copy_records_to_table(
+                    self.table,
+                    records=records,
+                    columns=["text", "metadata_", "node_id", "embedding"]
+                )
+            else:
+                await self.conn.executemany(
+                    f'INSERT INTO "{self.table}" (text, metadata_, node_id, embedding) '
+                    f"VALUES ($1, $2::json, $3, $4)",
+                    records
+                )
+        for node in nodes:
+            self.existing_hashes[node.node_id] = node.metadata["content_hash"]
+        self.stats["written"] += len(nodes)
+
+    async def prune(self, keep_ids: Set[str], force: bool = False):
+        """Delete every node the source no longer produces"""
+        if not keep_ids and not force:
+            # An empty or fully filtered source would otherwise wipe the table
+            raise ValueError(
+                f"Refusing to prune {self.table}: the source produced no nodes; pass --force to empty the table"
+            )
+        status = await self.conn.execute(
+            f'DELETE FROM "{self.table}" WHERE NOT (node_id = ANY($1::varchar[]))',
+            list(keep_ids)
+        )
+        pruned = int(status.split()[-1])
+        for node_id in set(self.existing_hashes) - keep_ids:
+            del self.existing_hashes[node_id]
+        self.stats["pruned"] += pruned
+
+    async def ingest(
+        self,
+        path: str,
+        id_column: Optional[str] = None,
+        text_columns: Optional[List[str]] = None,
+        checkpoint_path: Optional[str] = None,
+        prune: bool = False,
+        force: bool = False
+    ) -> Dict:
+        """Stream the source file through embed + write, committing one window of batches at a time"""
+        await self.load_existing_hashes()
+        if self.existing_hashes and not id_column and not prune:
+            raise ValueError(
+                f"{self.table} already has rows: pass --id-column so edited rows replace their old "
+                "version, or --prune to treat this file as the complete alumni set"
+            )
+        start_row = load_checkpoint(checkpoint_path, path) if checkpoint_path else 0
+        if start_row:
+            print(f"Resuming after row {start_row}")
+
+        window_rows = self.batch_size * self.concurrency
+        # Keyed by node_id: a repeated row within one window is written once (last one wins)
+        pending: Dict[str, TextNode] = {}
+        seen_ids: Set[str] = set()
+        rows_done = start_row
+
+        async def flush(committed_rows: int):
+            nodes = list(pending.values())
+            batches = [nodes[i:i + self.batch_size] for i in range(0, len(nodes), self.batch_size)]
+            await self.embed_batches(batches)
+            await self.write(nodes)
+            self.stats["embedded"] += len(nodes)
+            pending.clear()
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, path, committed_rows)
+            print(f"Committed through row {committed_rows} ({self.stats})")
+
+        for row_number, row in enumerate(read_rows(path)):
+            if row_number < start_row:
+                if prune:
+                    # Committed by an earlier run; only its id is needed to keep it
+                    identity = self.node_identity(row, id_column, text_columns)
+                    if identity:
+                        seen_ids.add(identity[0])
+                continue
+            self.stats["read"] += 1
+            node = self.build_node(row, id_column, text_columns)
+            if node is None:
+                self.stats["skipped"] += 1
+                identity = self.node_identity(row, id_column, text_columns) if prune else None
+                if identity:
+                    seen_ids.add(identity[0])
+            else:
+                if node.node_id in pending:
+                    self.stats["duplicates"] += 1
+                pending[node.node_id] = node
+                seen_ids.add(node.node_id)
+            rows_done = row_number + 1
+            if len(pending) >= window_rows:
+                await flush(rows_done)
+
+        await flush(rows_done)
+        if prune:
+            await self.prune(seen_ids, force)
+        return self.stats
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest alumni records into the alumni vector table")
+    parser.add_argument("path", help="CSV, XLSX or JSONL file with one alumni record per row")
+    parser.add_argument("--table", default=config.ALUMNI_TABLE_NAME)
+    parser.add_argument("--id-column", default=None, help="Stable alumni identifier; defaults to the content hash")
+    parser.add_argument("--text-columns", nargs="*", default=None, help="Columns to include in node text, in order")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per embedding request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent embedding requests")
+    parser.add_argument("--write-mode", choices=["copy", "executemany"], default="copy")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file; defaults to <path>.checkpoint.json")
+    parser.add_argument("--no-checkpoint", action="store_true")
+    parser.add_argument(
+        "--prune", action="store_true",
+        help="Treat the file as the complete alumni set and delete nodes it no longer produces"
+    )
+    parser.add_argument("--force", action="store_true", help="Allow --prune to empty the table")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    url = make_url(os.getenv("DB_CONNECTION"))
+
+    # Let PGVectorStore create the table (and its generated text_search_tsv column) if needed
+    ensure_vector_table(build_vector_store(url, table_name=args.table))
+
+    conn = await asyncpg.connect(
+        user=url.username,
+        password=url.password,
+        host=url.host,
+        port=url.port,
+        database=config.VECTOR_DB_NAME
+    )
+    try:
+        await register_vector(conn)
+        ingestor = AlumniIngestor(
+            conn,
+            table_name=args.table,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            write_mode=args.write_mode
+        )
+        checkpoint = None if args.no_checkpoint else (args.checkpoint or f"{args.path}.checkpoint.json")
+        stats = await ingestor.ingest(args.path, args.id_column, args.text_columns, checkpoint, args.prune, args.force)
+        print(json.dumps(stats, indent=2))
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
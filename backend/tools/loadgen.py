@@ -0,0 +1,241 @@
+# tools/loadgen.py
+"""
+Websocket load generator for /ws/profile and /ws/verify_session.
+
+Each virtual advisor submits a StudentInfo form through /ws/profile, then asks
+/ws/verify_session for the returned session_id, exactly like the frontend. Run
+from the backend directory:
+
+    # One uvicorn worker with the agents swapped for tools.fakes (OpenAI and
+    # Tavily are never called; sessions still go to DB_CONNECTION, e.g. a local
+    # Postgres)
+    python -m tools.loadgen serve --port 8001 --time-scale 0.2
+
+    # 50 concurrent advisors, 200 sessions, streaming endpoints
+    python -m tools.loadgen run --url ws://localhost:8001 --clients 50 --sessions 200 --stream --output load.json
+
+The report has time-to-first-message and time-to-final per endpoint, error rate,
+and event-loop lag on both the client and (for ``serve``) the server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+import uvicorn
+from websockets.asyncio.client import connect
+from tools.benchmark import PipelineBench, add_fake_args, sample_student
+from utils.stats import LoopLagMonitor, summarize_latencies
+
+LAG_PATH = "/debug/loop_lag"
+
+async def serve(args: argparse.Namespace):
+    """Run app.py on one worker with fake-backed agents and a loop-lag endpoint"""
+    # The real clients are still constructed at import time and need some key
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    os.environ.setdefault("TAVILY_API_KEY", "offline")
+    import app as server
+
+    bench = PipelineBench(args)
+    server.search_agent.internet_scheduler.shutdown()
+    server.profile_agent = bench.profile_agent
+    server.search_agent = bench.search_agent
+    server.recommendation_agent = bench.recommendation_agent
+
+    monitor = LoopLagMonitor()
+
+    @server.app.get(LAG_PATH)
+    async def loop_lag(reset: bool = False):
+        summary = monitor.summary()
+        if reset:
+            monitor.reset()
+        return summary
+
+    monitor.start()
+    try:
+        await uvicorn.Server(uvicorn.Config(server.app, host=args.host, port=args.port, log_level="warning")).serve()
+    finally:
+        await monitor.stop()
+
+def load_payloads(path: Optional[str], count: int) -> List[Dict]:
+    """StudentInfo payloads from a JSONL file (cycled), or synthetic ones"""
+    if not path:
+        return [sample_student(i).dict() for i in range(count)]
+    with open(path) as f:
+        payloads = [json.loads(line) for line in f if line.strip()]
+    return [payloads[i % len(payloads)] for i in range(count)]
+
+async def exchange(url: str, request: Dict, final_type: str, timeout: float) -> Tuple[Dict, float, float]:
+    """
+    Send one request and read messages until ``final_type`` or an error.
+
+    Returns:
+        (final payload, seconds to first message, seconds to final message)
+    """
+    start = time.perf_counter()
+    first = None
+
+    async def read_until_final(ws) -> Dict:
+        nonlocal first
+        while True:
+            message = json.loads(await ws.recv())
+            if first is None:
+                first = time.perf_counter() - start
+            if message["type"] == "error":
+                raise RuntimeError(message["payload"])
+            if message["type"] == final_type:
+                return message["payload"]
+
+    async with connect(url, open_timeout=timeout, close_timeout=1, max_size=None) as ws:
+        await ws.send(json.dumps(request))
+        payload = await asyncio.wait_for(read_until_final(ws), timeout=timeout)
+    return payload, first, time.perf_counter() - start
+
+class LoadRun:
+    """Virtual advisors driving the two websocket endpoints"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.base_url = args.url.rstrip("/")
+        self.query = "?stream=true" if args.stream else ""
+        self.timeout = args.timeout
+        self.samples: Dict[str, List[float]] = {
+            name: [] for name in (
+                "profile_first_message", "profile_final",
+                "verify_first_message", "verify_final", "end_to_end"
+            )
+        }
+        self.errors: Dict[str, int] = {}
+
+    def _record_error(self, stage: str, error: BaseException):
+        kind = f"{stage}: {type(error).__name__}"
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def advisor(self, payload: Dict):
+        start = time.perf_counter()
+        try:
+            profile, first, final = await exchange(
+                f"{self.base_url}/ws/profile{self.query}", payload, "profile_summary", self.timeout
+            )
+        except Exception as e:
+            self._record_error("profile", e)
+            return
+        self.samples["profile_first_message"].append(first)
+        self.samples["profile_final"].append(final)
+
+        try:
+            _, first, final = await exchange(
+                f"{self.base_url}/ws/verify_session{self.query}",
+                {"session_id": profile["session_id"], "summary": profile["summary"]},
+                "recommendations",
+                self.timeout
+            )
+        except Exception as e:
+            self._record_error("verify_session", e)
+            return
+        self.samples["verify_first_message"].append(first)
+        self.samples["verify_final"].append(final)
+        self.samples["end_to_end"].append(time.perf_counter() - start)
+
+    async def run(self, payloads: List[Dict], clients: int, ramp_up: float) -> float:
+        """Run every payload with at most ``clients`` advisors connected; returns elapsed seconds"""
+        semaphore = asyncio.Semaphore(clients)
+
+        async def one(i: int, payload: Dict):
+            # Spread the first wave of connections over the ramp-up window
+            if ramp_up and i < clients:
+                await asyncio.sleep(ramp_up * i / clients)
+            async with semaphore:
+                await self.advisor(payload)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i, payload) for i, payload in enumerate(payloads)))
+        return time.perf_counter() - start
+
+async def server_loop_lag(ws_url: str, reset: bool = False) -> Optional[Dict]:
+    """Loop-lag summary from a ``serve`` instance; None for servers without the endpoint"""
+    parsed = urlparse(ws_url)
+    scheme = "https" if parsed.scheme == "wss" else "http"
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(f"{scheme}://{parsed.netloc}{LAG_PATH}", params={"reset": reset})
+            response.raise_for_status()
+            return response.json()
+    except Exception:
+        return None
+
+async def run(args: argparse.Namespace) -> int:
+    payloads = load_payloads(args.payloads, args.sessions)
+    load = LoadRun(args)
+    client_lag = LoopLagMonitor()
+
+    await server_loop_lag(args.url, reset=True)
+    client_lag.start()
+    try:
+        elapsed = await load.run(payloads, args.clients, args.ramp_up)
+    finally:
+        await client_lag.stop()
+
+    completed = len(load.samples["end_to_end"])
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("command", "output")},
+        "sessions": len(payloads),
+        "completed": completed,
+        "errors": load.errors,
+        "error_rate": round(1 - completed / len(payloads), 4) if payloads else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_sessions_per_s": round(completed / elapsed, 3) if elapsed else None,
+        "latency": {name: summarize_latencies(values) for name, values in load.samples.items()},
+        "client_loop_lag": client_lag.summary(),
+        "server_loop_lag": await server_loop_lag(args.url),
+    }
+
+    final = report["latency"]["verify_final"]
+    print(
+        f"completed={completed}/{len(payloads)} throughput={report['throughput_sessions_per_s']}/s "
+        f"final p50={final.get('p50_ms')}ms p95={final.get('p95_ms')}ms errors={sum(load.errors.values())}",
+        file=sys.stderr
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        return 1
+    return 0
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Websocket load generator for the advising backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the app with fake-backed agents")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8001)
+    add_fake_args(serve_parser)
+
+    run_parser = subparsers.add_parser("run", help="Drive concurrent advisors against a running server")
+    run_parser.add_argument("--url", default="ws://127.0.0.1:8001")
+    run_parser.add_argument("--clients", type=int, default=10, help="Concurrent advisors")
+    run_parser.add_argument("--sessions", type=int, default=50, help="Total profile + verify_session round trips")
+    run_parser.add_argument("--payloads", help="JSONL file of StudentInfo payloads; synthetic when omitted")
+    run_parser.add_argument("--stream", action="store_true", help="Use the ?stream=true endpoints")
+    run_parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which the first clients connect")
+    run_parser.add_argument("--timeout", type=float, default=180.0, help="Per-endpoint deadline")
+    run_parser.add_argument("--output", help="Write the JSON report here")
+    run_parser.add_argument("--max-error-rate", type=float, help="Exit non-zero above this error rate")
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "serve":
+        await serve(args)
+        return 0
+    return await run(args)
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,262 @@
+# tools/migrate_embeddings.py
+"""
+Make the alumni vector table ANN-indexable and measure the trade-off.
+
+Run from the backend directory:
+
+    # Index the existing 3072-dim table as halfvec (no re-embedding needed)
+    python -m tools.migrate_embeddings index --storage halfvec
+
+    # Copy into data_alumni_records_d1024 with Matryoshka-truncated vectors
+    python -m tools.migrate_embeddings truncate --dim 1024
+    python -m tools.migrate_embeddings truncate --dim 1024 --reembed   # re-embed via the API instead
+
+    # Recall@k and latency of an indexed layout against the current exact scan
+    python -m tools.migrate_embeddings compare --target alumni_records_d1024 --dim 1024 --storage vector
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from database.hybrid_search import format_vector
+from utils.stats import percentile
+from database.vector_store import (
+    build_embedding_model,
+    build_vector_store,
+    distance_expression,
+    ensure_vector_table,
+    hnsw_index_ddl,
+)
+import config
+
+load_dotenv()
+
+def create_engine_from_env() -> AsyncEngine:
+    """Async engine on the vector database, built from DB_CONNECTION"""
+    url = make_url(os.getenv("DB_CONNECTION"))
+    return create_async_engine(url.set(drivername="postgresql+asyncpg", database=config.VECTOR_DB_NAME))
+
+def normalize(vector: List[float]) -> List[float]:
+    """L2-normalize a vector (truncated Matryoshka embeddings must be renormalized)"""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+async def create_index(engine: AsyncEngine, table_name: str, dim: int, storage: str):
+    """Build the HNSW index for a table (can take minutes on large tables)"""
+    async with engine.begin() as conn:
+        await conn.execute(text("SET maintenance_work_mem = '1GB'"))
+        await conn.execute(text(hnsw_index_ddl(table_name, dim, storage)))
+    print(f"HNSW index ready on data_{table_name} ({storage}, {dim} dims)")
+
+async def truncate_table(
+    engine: AsyncEngine,
+    source: str,
+    target: str,
+    dim: int,
+    storage: str,
+    batch_size: int,
+    reembed: bool
+):
+    """Copy source rows into target with dim-sized embeddings, resuming after the last copied id"""
+    # Let PGVectorStore create the target table so its schema matches what the app expects;
+    # the index is built after the load, which is much faster than maintaining it row by row.
+    target_store = build_vector_store(
+        make_url(os.getenv("DB_CONNECTION")),
+        table_name=target,
+        embed_dim=dim,
+        storage=storage,
+        create_index=False
+    )
+    ensure_vector_table(target_store)
+
+    embed_model = build_embedding_model(embed_dim=dim) if reembed else None
+    source_table, target_table = f'"data_{source}"', f'"data_{target}"'
+
+    async with engine.connect() as conn:
+        resume_after = (await conn.execute(text(
+            f"SELECT coalesce(max(CAST(metadata_->>'source_id' AS bigint)), 0) FROM {target_table}"
+        ))).scalar()
+    copied = 0
+
+    while True:
+        async with engine.begin() as conn:
+            if reembed:
+                rows = (await conn.execute(text(
+                    f"SELECT id, text, metadata_, node_id FROM {source_table} "
+                    f"WHERE id > :after ORDER BY id LIMIT :limit"
+                ), {"after": resume_after, "limit": batch_size})).fetchall()
+                if not rows:
+                    break
+                embeddings = await embed_model.aget_text_embedding_batch([row.text for row in rows])
+                await conn.execute(text(
+                    f"INSERT INTO {target_table} (text, metadata_, node_id, embedding) "
+                    f"VALUES (:text, CAST(:metadata AS json), :node_id, CAST(:embedding AS vector({dim})))"
+                ), [
+                    {
+                        "text": row.text,
+                        "metadata": json.dumps({**(row.metadata_ or {}), "source_id": row.id}),
+                        "node_id": row.node_id,
+                        "embedding": format_vector(embedding),
+                    }
+                    for row, embedding in zip(rows, embeddings)
+                ])
+                copied_ids = [row.id for row in rows]
+            else:
+                # Matryoshka truncation in SQL: keep the first dim components and renormalize
+                copied_ids = (await conn.execute(text(
+                    f"INSERT INTO {target_table} (text, metadata_, node_id, embedding) "
+                    f"SELECT text, "
+                    f"CAST(jsonb_set(coalesce(CAST(metadata_ AS jsonb), '{{}}'), '{{source_id}}', to_jsonb(id)) AS json), "
+                    f"node_id, CAST(l2_normalize(subvector(embedding, 1, {dim})) AS vector({dim})) "
+                    f"FROM {source_table} WHERE id > :after ORDER BY id LIMIT :limit "
+                    f"RETURNING CAST(metadata_->>'source_id' AS bigint)"
+                ), {"after": resume_after, "limit": batch_size})).scalars().all()
+                if not copied_ids:
+                    break
+
+        resume_after = max(copied_ids)
+        copied += len(copied_ids)
+        print(f"Copied {copied} rows (last source id {resume_after})")
+
+    if storage == "vector" and dim > 2000:
+        print("Skipping index: plain vector columns above 2000 dims are not indexable")
+    else:
+        await create_index(engine, target, dim, storage)
+    print(f"Set ALUMNI_TABLE_NAME={target} EMBED_DIM={dim} VECTOR_STORAGE={storage} to serve from it")
+
+async def sample_queries(engine: AsyncEngine, source: str, samples: int) -> List[Tuple[str, List[float]]]:
+    """
+    Use stored alumni embeddings as query vectors so the comparison needs no API calls.
+
+    Returns (node_id, embedding) pairs; the node itself is excluded from its own results,
+    otherwise both scans trivially agree on the exact match and recall is inflated.
+    """
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(
+            f'SELECT node_id, CAST(embedding AS text) AS embedding FROM "data_{source}" '
+            f'ORDER BY random() LIMIT :n'
+        ), {"n": samples})).fetchall()
+    return [(row.node_id, json.loads(row.embedding)) for row in rows]
+
+async def timed_knn(
+    engine: AsyncEngine,
+    table_name: str,
+    query: List[float],
+    k: int,
+    distance: str,
+    exact: bool,
+    exclude_node_id: str
+) -> Tuple[List[str], float]:
+    """Run one KNN query, skipping the node the query vector came from, and return (node_ids, seconds)"""
+    async with engine.begin() as conn:
+        if exact:
+            # Force the sequential scan the app does today
+            await conn.execute(text("SET LOCAL enable_indexscan = off"))
+        else:
+            await conn.execute(text(f"SET LOCAL hnsw.ef_search = {config.HNSW_EF_SEARCH}"))
+        started = time.perf_counter()
+        rows = (await conn.execute(text(
+            f'SELECT node_id FROM "data_{table_name}" WHERE node_id <> :exclude ORDER BY {distance} LIMIT :k'
+        ), {"qvec": format_vector(query), "k": k, "exclude": exclude_node_id})).fetchall()
+        elapsed = time.perf_counter() - started
+    return [row.node_id for row in rows], elapsed
+
+async def compare(
+    engine: AsyncEngine,
+    source: str,
+    target: str,
+    dim: int,
+    storage: str,
+    k: int,
+    samples: int
+) -> Dict:
+    """Recall@k and latency of the indexed target against an exact full-precision scan of source"""
+    queries = await sample_queries(engine, source, samples)
+    exact_distance = distance_expression(0, "vector", "CAST(:qvec AS vector)")
+    ann_distance = distance_expression(dim, storage, "CAST(:qvec AS vector)")
+
+    recalls, exact_latencies, ann_latencies = [], [], []
+    for node_id, query in queries:
+        exact_ids, exact_seconds = await timed_knn(
+            engine, source, query, k, exact_distance, exact=True, exclude_node_id=node_id
+        )
+        ann_query = normalize(query[:dim]) if dim < len(query) else query
+        ann_ids, ann_seconds = await timed_knn(
+            engine, target, ann_query, k, ann_distance, exact=False, exclude_node_id=node_id
+        )
+        recalls.append(len(set(exact_ids) & set(ann_ids)) / max(1, len(exact_ids)))
+        exact_latencies.append(exact_seconds * 1000)
+        ann_latencies.append(ann_seconds * 1000)
+
+    def summarize(latencies: List[float]) -> Dict:
+        return {
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+        }
+
+    return {
+        "source": source,
+        "target": target,
+        "dim": dim,
+        "storage": storage,
+        "k": k,
+        "queries": len(queries),
+        "recall_at_k": round(statistics.mean(recalls), 4) if recalls else None,
+        "exact_scan": summarize(exact_latencies) if queries else None,
+        "ann_index": summarize(ann_latencies) if queries else None,
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Migrate alumni embeddings to an ANN-indexable layout")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Create an HNSW index on an existing table")
+    index_parser.add_argument("--table", default=config.ALUMNI_TABLE_NAME)
+    index_parser.add_argument("--dim", type=int, default=config.EMBED_DIM)
+    index_parser.add_argument("--storage", choices=["vector", "halfvec"], default="halfvec")
+
+    truncate_parser = subparsers.add_parser("truncate", help="Copy into a reduced-dimension table")
+    truncate_parser.add_argument("--source", default="alumni_records")
+    truncate_parser.add_argument("--target", default=None, help="Defaults to <source>_d<dim>")
+    truncate_parser.add_argument("--dim", type=int, required=True)
+    truncate_parser.add_argument("--storage", choices=["vector", "halfvec"], default="vector")
+    truncate_parser.add_argument("--batch-size", type=int, default=500)
+    truncate_parser.add_argument("--reembed", action="store_true", help="Re-embed text via the API instead of truncating in SQL")
+
+    compare_parser = subparsers.add_parser("compare", help="Recall@k and latency against the exact scan")
+    compare_parser.add_argument("--source", default="alumni_records")
+    compare_parser.add_argument("--target", default=None, help="Defaults to --source (e.g. halfvec index on the same table)")
+    compare_parser.add_argument("--dim", type=int, default=config.EMBED_DIM)
+    compare_parser.add_argument("--storage", choices=["vector", "halfvec"], default=config.VECTOR_STORAGE)
+    compare_parser.add_argument("--k", type=int, default=5)
+    compare_parser.add_argument("--samples", type=int, default=100)
+
+    return parser.parse_args(argv)
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    engine = create_engine_from_env()
+    try:
+        if args.command == "index":
+            await create_index(engine, args.table, args.dim, args.storage)
+        elif args.command == "truncate":
+            target = args.target or f"{args.source}_d{args.dim}"
+            await truncate_table(engine, args.source, target, args.dim, args.storage, args.batch_size, args.reembed)
+        elif args.command == "compare":
+            report = await compare(
+                engine, args.source, args.target or args.source, args.dim, args.storage, args.k, args.samples
+            )
+            print(json.dumps(report, indent=2))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
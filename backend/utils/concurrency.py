@@ -0,0 +1,92 @@
+# utils/concurrency.py
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """Async token-bucket rate limiter shared by every caller of a scheduler"""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate: Tokens added per second; 0 or less disables limiting
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it (FIFO across waiters)"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one shared in-flight call"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await ``func()`` unless a call for ``key`` is already running, in which case
+        await that call's result instead. A cancelled caller does not cancel the
+        shared call for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every caller has gone away
+
+async def retry_with_jitter(
+    func: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    deadline: Optional[float] = None,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,)
+) -> T:
+    """
+    Call ``func`` up to ``attempts`` times with full-jitter exponential backoff.
+
+    ``deadline`` is an absolute ``loop.time()`` bound shared by all attempts; each
+    attempt is cut off when it is reached and no retry is started past it.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(max(1, attempts)):
+        remaining = None if deadline is None else deadline - loop.time()
+        if remaining is not None and remaining <= 0:
+            raise asyncio.TimeoutError()
+        try:
+            return await asyncio.wait_for(func(), timeout=remaining)
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, base_delay * (2 ** attempt))
+            if deadline is not None and loop.time() + delay >= deadline:
+                raise
+            await asyncio.sleep(delay)
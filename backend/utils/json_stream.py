@@ -0,0 +1,56 @@
+# utils/json_stream.py
+import json
+from typing import Any, List
+
+class IncrementalArrayParser:
+    """
+    Incrementally extract the elements of a JSON array of objects from a text stream.
+
+    Built for structured-output streams shaped like ``{"key": [{...}, {...}]}``: every
+    object whose opening brace sits at ``item_depth`` nesting levels is decoded and
+    returned from ``feed`` as soon as its closing brace arrives.
+    """
+
+    def __init__(self, item_depth: int = 2):
+        """
+        Args:
+            item_depth: Number of enclosing containers around each element
+                (2 for an array held in the top-level object)
+        """
+        self.item_depth = item_depth
+        self._buffer = []
+        self._collecting = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next chunk and return any array elements completed by it"""
+        completed = []
+        for char in chunk:
+            if self._collecting:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._depth == self.item_depth and not self._collecting:
+                    self._collecting = True
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._depth == self.item_depth and self._collecting:
+                    completed.append(json.loads("".join(self._buffer)))
+                    self._collecting = False
+                    self._buffer = []
+        return completed
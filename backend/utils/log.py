@@ -0,0 +1,133 @@
+# utils/log.py
+"""
+Structured, non-blocking logging.
+
+Call sites use the standard library (``logger = logging.getLogger(__name__)``;
+extra fields via ``extra={...}``). setup_logging() routes every record through a
+QueueHandler, so the event loop only pays for building the record; a listener
+thread formats it as one JSON line and writes it to stdout. Records carry the
+current session_id (see bind_session_id) and, when tracing is on, the trace id.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from opentelemetry import trace
+import config
+
+session_id_var: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+# LogRecord attributes that are not user-supplied extra fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "session_id", "trace_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def bind_session_id(session_id) -> None:
+    """Tag every record logged from this task (and tasks it starts) with ``session_id``"""
+    session_id_var.set(str(session_id) if session_id is not None else None)
+
+class ContextFilter(logging.Filter):
+    """
+    Runs in the calling thread, on the queue handler, before the record is
+    queued: captures the context-local session and trace ids, and samples DEBUG records. Sampling is
+    per session, so a sampled request keeps all of its debug lines.
+    """
+
+    def __init__(self, debug_sample_rate: float = 1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def _keep_debug(self, session_id: Optional[str]) -> bool:
+        if self.debug_sample_rate >= 1:
+            return True
+        if session_id is None:
+            return random.random() < self.debug_sample_rate
+        return zlib.crc32(session_id.encode()) % 10000 < self.debug_sample_rate * 10000
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        session_id = session_id_var.get()
+        if record.levelno <= logging.DEBUG and not self._keep_debug(session_id):
+            return False
+        record.session_id = session_id
+        span_context = trace.get_current_span().get_span_context()
+        record.trace_id = format(span_context.trace_id, "032x") if span_context.is_valid else None
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, context ids and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("session_id", "trace_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Merges the message args and renders exceptions before queueing; output formatting
+    (text or JSON) is left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Args may be mutable objects the caller changes before the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks reference frames that may change before the listener runs
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(
+    level: str = config.LOG_LEVEL,
+    log_format: str = config.LOG_FORMAT,
+    debug_sample_rate: float = config.LOG_DEBUG_SAMPLE_RATE
+):
+    """Install the queue handler on the root logger (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(session_id)s] %(message)s"))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records (call on shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,292 @@
+# utils/metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Every metric lives in one process (one uvicorn worker); scrape each worker and
+aggregate in Prometheus. Callback metrics are read at scrape time, so pool and
+cache numbers never go stale.
+"""
+import asyncio
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+import functools
+import logging
+from utils.tracing import record_token_usage
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track(self, *labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket (non-cumulative) counts, +Inf last, then sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose samples are produced at scrape time"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]],
+        kind: str = "gauge"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+        self._failing = False
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.collect()
+        except Exception:
+            # A broken collector must not fail the scrape; log it once per failure streak
+            if not self._failing:
+                logger.exception("Metric collector for %s failed", self.name)
+            self._failing = True
+            return []
+        self._failing = False
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(samples.items())
+        ]
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]],
+        kind: str = "gauge"
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, collect, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            samples = metric.render()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+WEBSOCKET_SESSION_SECONDS = REGISTRY.histogram(
+    "advising_websocket_session_seconds", "Websocket session duration", ["endpoint"]
+)
+ACTIVE_WEBSOCKETS = REGISTRY.gauge(
+    "advising_active_websockets", "Open websocket connections", ["endpoint"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "advising_stage_seconds", "Pipeline stage duration", ["stage"]
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "advising_stage_errors_total", "Pipeline stage failures", ["stage"]
+)
+LLM_CALLS = REGISTRY.counter(
+    "advising_llm_calls_total", "LLM completion calls", ["purpose", "status"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "advising_llm_tokens_total", "LLM tokens reported by the API", ["purpose", "type"]
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "advising_llm_in_flight", "LLM calls currently awaiting a response", ["purpose"]
+)
+TAVILY_CALLS = REGISTRY.counter(
+    "advising_tavily_calls_total", "Upstream Tavily calls, one per attempt", ["status"]
+)
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Observe the enclosed block's duration and count it as failed if it raises (cancellation is not a failure)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except BaseException:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+@contextmanager
+def llm_call(purpose: str) -> Iterator[None]:
+    """In-flight gauge and ok/error call counter around one LLM request"""
+    status = "error"
+    with LLM_IN_FLIGHT.track(purpose):
+        try:
+            yield
+            status = "ok"
+        finally:
+            LLM_CALLS.inc(purpose, status)
+
+def observe_llm_usage(purpose: str, usage: Any):
+    """Token usage onto the current span and the token counters"""
+    tokens = record_token_usage(usage)
+    for kind in ("prompt", "completion"):
+        count = tokens.get(f"{kind}_tokens")
+        if count:
+            LLM_TOKENS.inc(purpose, kind, amount=count)
+
+def track_websocket(endpoint: str) -> Callable:
+    """Count an async websocket handler as active and observe its duration"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with ACTIVE_WEBSOCKETS.track(endpoint), WEBSOCKET_SESSION_SECONDS.time(endpoint):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,56 @@
+# utils/stats.py
+import asyncio
+import math
+import statistics
+from collections import deque
+from typing import Dict, List, Optional
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+def summarize_latencies(latencies: List[float]) -> Dict:
+    """p50/p95/p99/mean/max in milliseconds for latencies given in seconds"""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how much later than requested a short sleep wakes up"""
+
+    def __init__(self, interval: float = 0.05, max_samples: int = 100000):
+        self.interval = interval
+        self.samples: "deque[float]" = deque(maxlen=max_samples)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def reset(self):
+        self.samples.clear()
+
+    def summary(self) -> Dict:
+        return summarize_latencies(list(self.samples))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
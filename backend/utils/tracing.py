@@ -0,0 +1,110 @@
+# utils/tracing.py
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+from google.protobuf.json_format import MessageToJson
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+import config
+
+# API-only tracer: a no-op until setup_tracing installs an SDK provider
+tracer = trace.get_tracer("ai_advising")
+
+class OTLPFileSpanExporter(SpanExporter):
+    """Appends each export batch as one OTLP/JSON line, the format of the collector's file exporter"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        line = MessageToJson(encode_spans(spans), indent=None)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+def build_exporter(kind: str) -> Optional[SpanExporter]:
+    if kind == "none":
+        return None
+    if kind == "console":
+        return ConsoleSpanExporter()
+    if kind == "otlp-file":
+        return OTLPFileSpanExporter(config.TRACING_FILE)
+    if kind == "otlp":
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+def setup_tracing(exporter: str = config.TRACING_EXPORTER):
+    """Install the SDK provider; spans are exported from a background thread in batches"""
+    span_exporter = build_exporter(exporter)
+    if span_exporter is None:
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": config.SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(config.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+
+def shutdown_tracing():
+    """Flush pending spans"""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Run an async function inside a span named ``name`` (default: its qualified name)"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name, attributes=attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_attributes(**attributes: Any):
+    """Attach attributes to the current span; None values are skipped"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+
+def completion_usage(response: Any) -> Any:
+    """``usage`` from the raw OpenAI payload behind a llama_index completion response"""
+    raw = getattr(response, "raw", None)
+    if isinstance(raw, dict):
+        return raw.get("usage")
+    return getattr(raw, "usage", None)
+
+def token_counts(usage: Any) -> Dict[str, Optional[int]]:
+    """prompt/completion/total token counts from an OpenAI ``usage`` object or dict"""
+    if usage is None:
+        return {}
+    get = usage.get if isinstance(usage, dict) else functools.partial(getattr, usage)
+    return {name: get(name, None) for name in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+def record_token_usage(usage: Any) -> Dict[str, Optional[int]]:
+    """Token counts onto the current span; returns them for other consumers"""
+    tokens = token_counts(usage)
+    set_attributes(**{f"llm.{name}": count for name, count in tokens.items()})
+    return tokens
@@ -50,7 +50,7 @@ export default function StudentForm() {
         setSessionId(null)
     
         try {
-            const ws = new WebSocket('ws://localhost:8000/ws/profile')
+            const ws = new WebSocket('ws://localhost:8000/ws/profile?stream=true')
     
             ws.onopen = () => {
                 console.log('WebSocket opened')
@@ -60,7 +60,9 @@ export default function StudentForm() {
             ws.onmessage = (event) => {
                 console.log('Received message:', event.data)
                 const response = JSON.parse(event.data)
-                if (response.type === 'profile_summary') {
+                if (response.type === 'profile_summary_delta') {
+                    setSummary(prev => (prev ?? '') + response.payload.delta)
+                } else if (response.type === 'profile_summary') {
                     const profileData = response.payload as ProfileResponse
                     setSummary(profileData.summary)
                     setSessionId(profileData.session_id)
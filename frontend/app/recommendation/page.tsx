@@ -38,6 +38,7 @@ interface RecommendationsResponse {
 
 type WebSocketMessage =
   | { type: 'status'; payload: { message: string } }
+  | { type: 'recommendation'; payload: Recommendation }
   | { type: 'recommendations'; payload: RecommendationsResponse }
   | { type: 'error'; payload: string };
 
@@ -98,7 +99,7 @@ export default function RecommendationPage() {
       // Only establish WebSocket if we haven't set recommendations yet
       if (!hasSetRecommendations) {
         try {
-          ws = new WebSocket('ws://localhost:8000/ws/verify_session');
+          ws = new WebSocket('ws://localhost:8000/ws/verify_session?stream=true');
 
           ws.onopen = () => {
             console.log('WebSocket connected');
@@ -124,6 +125,17 @@ export default function RecommendationPage() {
                   setCurrentStatus(response.payload.message);
                   break;
 
+                case 'recommendation': {
+                  // Streamed card: render it as soon as it arrives
+                  const rec = response.payload;
+                  setRecommendations((prev) => [
+                    ...prev.filter((existing) => existing.id !== rec.id),
+                    { ...rec, type: normalizeRecommendationType(rec.type) },
+                  ]);
+                  setIsLoading(false);
+                  break;
+                }
+
                 case 'recommendations':
                   if (!hasSetRecommendations) {
                     setRecommendations(